@@ -1,15 +1,795 @@
-import requests
+import asyncio
+import hashlib
+import httpx
+import ipaddress
 import os
 import logging
-from typing import Dict, List, Optional
+import math
+import random
+import re
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set
+from urllib.parse import urlsplit
 from fastapi import HTTPException
 
+from .cache import Cache
+from .database import DB_POOL_ACQUIRE_TIMEOUT, get_pool
+
 logger = logging.getLogger(__name__)
 
-class AITranslator:
+# HTTP client tuning (override via environment)
+HF_TIMEOUT = float(os.getenv('HF_TIMEOUT', '30'))
+# Inference calls are bounded by the per-model adaptive limits below, so keep
+# HF_MAX_CONNECTIONS at or above HF_AIMD_MAX_LIMIT x models in use or the
+# connection pool, not the upstream, becomes the bottleneck
+HF_MAX_CONNECTIONS = int(os.getenv('HF_MAX_CONNECTIONS', '128'))
+HF_MAX_KEEPALIVE = int(os.getenv('HF_MAX_KEEPALIVE', '10'))
+HF_KEEPALIVE_EXPIRY = float(os.getenv('HF_KEEPALIVE_EXPIRY', '30'))
+# Warm-ups and keep-alive pings bypass the adaptive limits; cap them per host
+HF_MAX_CONCURRENCY_PER_HOST = int(os.getenv('HF_MAX_CONCURRENCY_PER_HOST', '8'))
+
+# Adaptive per-model concurrency: start at HF_AIMD_INITIAL_LIMIT in-flight
+# requests, add one per round of calls faster than HF_AIMD_LATENCY_TARGET
+# seconds, multiply by HF_AIMD_BACKOFF on 429/503/timeouts
+HF_AIMD_INITIAL_LIMIT = float(os.getenv('HF_AIMD_INITIAL_LIMIT', '2'))
+HF_AIMD_MIN_LIMIT = float(os.getenv('HF_AIMD_MIN_LIMIT', '1'))
+HF_AIMD_MAX_LIMIT = float(os.getenv('HF_AIMD_MAX_LIMIT', '16'))
+HF_AIMD_LATENCY_TARGET = float(os.getenv('HF_AIMD_LATENCY_TARGET', '10'))
+HF_AIMD_BACKOFF = float(os.getenv('HF_AIMD_BACKOFF', '0.5'))
+
+# Retries of throttled, loading (429/503) or timed-out inference calls
+HF_MAX_RETRIES = int(os.getenv('HF_MAX_RETRIES', '3'))
+HF_RETRY_BACKOFF = float(os.getenv('HF_RETRY_BACKOFF', '0.5'))
+HF_MAX_RETRY_DELAY = float(os.getenv('HF_MAX_RETRY_DELAY', '30'))
+
+_OVERLOAD_STATUS = {429, 503}
+
+# Circuit breaker per engine and model: open after this many consecutive
+# failures, then let one probe call through after TRANSLATION_BREAKER_RESET seconds
+TRANSLATION_BREAKER_FAILURES = int(os.getenv('TRANSLATION_BREAKER_FAILURES', '5'))
+TRANSLATION_BREAKER_RESET = float(os.getenv('TRANSLATION_BREAKER_RESET', '30'))
+
+# Hedged calls: when a call outlives this percentile of recent latencies for
+# its model, send a second one (to TRANSLATION_HEDGE_ENGINE if set) and take
+# whichever answers first
+TRANSLATION_HEDGE = os.getenv('TRANSLATION_HEDGE', 'false').lower() == 'true'
+TRANSLATION_HEDGE_PERCENTILE = float(os.getenv('TRANSLATION_HEDGE_PERCENTILE', '95'))
+TRANSLATION_HEDGE_MIN_SAMPLES = int(os.getenv('TRANSLATION_HEDGE_MIN_SAMPLES', '20'))
+TRANSLATION_HEDGE_ENGINE = os.getenv('TRANSLATION_HEDGE_ENGINE') or None
+
+# Model warm-up: every model is warmed at startup, then models used within
+# TRANSLATION_KEEPALIVE_WINDOW seconds are pinged every
+# TRANSLATION_KEEPALIVE_INTERVAL unless real traffic kept them warm. A model
+# with no successful call for TRANSLATION_MODEL_IDLE_TTL is reported cold.
+TRANSLATION_WARMUP = os.getenv('TRANSLATION_WARMUP', 'true').lower() == 'true'
+TRANSLATION_WARMUP_CONCURRENCY = int(os.getenv('TRANSLATION_WARMUP_CONCURRENCY', '2'))
+TRANSLATION_WARMUP_TIMEOUT = float(os.getenv('TRANSLATION_WARMUP_TIMEOUT', '120'))
+TRANSLATION_WARMUP_TEXT = os.getenv('TRANSLATION_WARMUP_TEXT', 'Hello')
+TRANSLATION_KEEPALIVE_INTERVAL = float(os.getenv('TRANSLATION_KEEPALIVE_INTERVAL', '300'))
+TRANSLATION_KEEPALIVE_WINDOW = float(os.getenv('TRANSLATION_KEEPALIVE_WINDOW', '3600'))
+TRANSLATION_MODEL_IDLE_TTL = float(os.getenv('TRANSLATION_MODEL_IDLE_TTL', '900'))
+
+# Translation cache tuning (override via environment)
+TRANSLATION_CACHE_TTL = float(os.getenv('TRANSLATION_CACHE_TTL', '86400'))
+TRANSLATION_CACHE_PERSIST = os.getenv('TRANSLATION_CACHE_PERSIST', 'true').lower() == 'true'
+
+# Batch packing limits for list-valued inference requests
+HF_BATCH_MAX_ITEMS = int(os.getenv('HF_BATCH_MAX_ITEMS', '32'))
+HF_BATCH_MAX_BYTES = int(os.getenv('HF_BATCH_MAX_BYTES', '16384'))
+
+# How long concurrent calls for one model wait to be merged into a shared
+# engine call (0 disables micro-batching); a full batch is sent immediately
+TRANSLATION_BATCH_MAX_WAIT_MS = float(os.getenv('TRANSLATION_BATCH_MAX_WAIT_MS', '5'))
+
+# Whole-resource translation settings
+RESOURCE_SEGMENT_MAX_CHARS = int(os.getenv('RESOURCE_SEGMENT_MAX_CHARS', '400'))
+RESOURCE_TRANSLATION_CONCURRENCY = int(os.getenv('RESOURCE_TRANSLATION_CONCURRENCY', '4'))
+RESOURCE_MAX_BYTES = int(os.getenv('RESOURCE_MAX_BYTES', str(2 * 1024 * 1024)))
+TEXT_FILE_TYPES = {"txt", "text", "md", "markdown", "text/plain", "text/markdown"}
+
+# Hosts resource files may be fetched from: exact names, or ".example.com"
+# for any subdomain. Only https on the default port, only public addresses.
+RESOURCE_FETCH_ALLOWED_HOSTS = [h.strip().lower() for h in os.getenv(
+    'RESOURCE_FETCH_ALLOWED_HOSTS', '.supabase.co'
+).split(',') if h.strip()]
+RESOURCE_FETCH_MAX_REDIRECTS = int(os.getenv('RESOURCE_FETCH_MAX_REDIRECTS', '3'))
+
+# Engine selection: TRANSLATION_ENGINE is the default for every language pair,
+# LOCAL_TRANSLATION_PAIRS (e.g. "en-sw,sw-en") are served in-process regardless
+TRANSLATION_ENGINE = os.getenv('TRANSLATION_ENGINE', 'remote')
+LOCAL_TRANSLATION_PAIRS = [p.strip() for p in os.getenv('LOCAL_TRANSLATION_PAIRS', '').split(',') if p.strip()]
+
+# Local engine tuning: where pre-downloaded (or quantized) models live, how
+# many inferences run at once, torch threads per inference and beam width
+LOCAL_TRANSLATION_MODEL_DIR = os.getenv('LOCAL_TRANSLATION_MODEL_DIR')
+LOCAL_TRANSLATION_WORKERS = int(os.getenv('LOCAL_TRANSLATION_WORKERS', '1'))
+LOCAL_TRANSLATION_THREADS = int(os.getenv('LOCAL_TRANSLATION_THREADS', str(os.cpu_count() or 1)))
+LOCAL_TRANSLATION_BEAMS = int(os.getenv('LOCAL_TRANSLATION_BEAMS', '1'))
+LOCAL_TRANSLATION_QUANTIZE = os.getenv('LOCAL_TRANSLATION_QUANTIZE', 'true').lower() == 'true'
+
+async def check_fetch_url(url: str):
+    """Raise ValueError unless url is https on an allowed host resolving only to public addresses"""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme != "https" or parts.username or parts.password or parts.port not in (None, 443):
+        raise ValueError(f"refusing to fetch {url!r}: only plain https URLs are allowed")
+    if not any(host.endswith(allowed) if allowed.startswith(".") else host == allowed
+               for allowed in RESOURCE_FETCH_ALLOWED_HOSTS):
+        raise ValueError(f"refusing to fetch {url!r}: host is not in RESOURCE_FETCH_ALLOWED_HOSTS")
+    infos = await asyncio.get_running_loop().getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if not address.is_global:
+            raise ValueError(f"refusing to fetch {url!r}: {host} resolves to non-public {address}")
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+def split_segments(text: str, max_chars: int = RESOURCE_SEGMENT_MAX_CHARS) -> List[List[str]]:
+    """
+    Split text into paragraphs of translation-sized segments.
+    
+    Paragraphs (blank-line separated) are kept whole when short enough,
+    otherwise split on sentence boundaries and re-joined up to max_chars.
+    """
+    paragraphs = []
+    for block in re.split(r'\n\s*\n', text):
+        block = " ".join(block.split())
+        if not block:
+            continue
+        if len(block) <= max_chars:
+            paragraphs.append([block])
+            continue
+        segments, current = [], ""
+        for sentence in _SENTENCE_BOUNDARY.split(block):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                segments.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            segments.append(current)
+        paragraphs.append(segments)
+    return paragraphs
+
+# ----------------------------
+# Translation engines
+# ----------------------------
+class TranslationEngine(ABC):
+    """Turns a list of texts into translations, in order, with one model"""
+    
+    name = "engine"
+    
+    async def start(self, models: Dict[str, str]):
+        """Prepare the models ({model_key: model_name}) this engine will serve"""
+    
+    @abstractmethod
+    async def translate(self, model_name: str, inputs: List[str]) -> List[str]:
+        ...
+    
+    async def warm(self, model_name: str):
+        """Make sure the model is loaded and ready; raises if it is not"""
+        await self.translate(model_name, [TRANSLATION_WARMUP_TEXT])
+    
+    def stats(self) -> Dict:
+        return {}
+    
+    async def aclose(self):
+        pass
+
+def retry_delay(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from Retry-After or a model-loading estimated_time, if given"""
+    delays = []
+    header = response.headers.get("retry-after")
+    if header:
+        try:
+            delays.append(float(header))
+        except ValueError:
+            try:
+                delays.append((parsedate_to_datetime(header).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    try:
+        body = response.json()
+        if isinstance(body, dict) and body.get("estimated_time") is not None:
+            delays.append(float(body["estimated_time"]))
+    except ValueError:
+        pass
+    return max(max(delays), 0.0) if delays else None
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on in-flight requests to one model.
+    
+    Each call that finishes under latency_target adds 1/limit (about +1 per
+    round of calls); a 429/503/timeout multiplies the limit by backoff, at
+    most once per round so one burst of rejections counts once. Retry-After
+    blocks new calls until it has passed.
+    """
+    
+    def __init__(self, initial: float = HF_AIMD_INITIAL_LIMIT, minimum: float = HF_AIMD_MIN_LIMIT,
+                 maximum: float = HF_AIMD_MAX_LIMIT, latency_target: float = HF_AIMD_LATENCY_TARGET,
+                 backoff: float = HF_AIMD_BACKOFF):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self.counters = {"requests": 0, "overloaded": 0, "increases": 0, "decreases": 0}
+    
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit) and self._blocked_until <= time.monotonic():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+    
+    async def acquire(self):
+        delay = self._blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self._waiters.remove(waiter)
+            else:
+                # Granted a slot just as we were cancelled: hand it on
+                self.in_flight -= 1
+                self._wake()
+            raise
+    
+    def release(self, started: float, overloaded: bool = False, delay: Optional[float] = None):
+        """Return a slot and adjust the limit from how the call went (started = its monotonic start)"""
+        now = time.monotonic()
+        self.in_flight -= 1
+        self.counters["requests"] += 1
+        if overloaded:
+            self.counters["overloaded"] += 1
+            # Only calls sent after the last cut count, so one burst of rejections halves once
+            if started >= self._last_decrease:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self._last_decrease = now
+                self.counters["decreases"] += 1
+            if delay:
+                self._blocked_until = max(self._blocked_until, now + delay)
+                asyncio.get_running_loop().call_later(delay, self._wake)
+        elif now - started <= self.latency_target and self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.counters["increases"] += 1
+        self._wake()
+    
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "blocked_for": round(max(self._blocked_until - time.monotonic(), 0.0), 2),
+        }
+
+class RemoteEngine(TranslationEngine):
+    """Hugging Face inference API over a shared keep-alive client"""
+    
+    name = "remote"
+    
     def __init__(self):
         self.api_key = os.getenv('HUGGINGFACE_API_KEY')
         self.base_url = "https://api-inference.huggingface.co/models"
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._model_limits: Dict[str, AdaptiveLimiter] = {}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created lazily inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(HF_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=HF_MAX_CONNECTIONS,
+                    max_keepalive_connections=HF_MAX_KEEPALIVE,
+                    keepalive_expiry=HF_KEEPALIVE_EXPIRY
+                ),
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+        return self._client
+    
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Semaphore bounding in-flight requests to a single upstream host"""
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(HF_MAX_CONCURRENCY_PER_HOST)
+        return self._host_limits[host]
+    
+    async def _post(self, url: str, payload: Dict, timeout: Optional[float] = None) -> httpx.Response:
+        """POST outside the adaptive limits (warm-ups), bounded per host; cancelling aborts the request"""
+        kwargs = {"timeout": timeout} if timeout is not None else {}
+        async with self._host_limit(url):
+            return await self._get_client().post(url, json=payload, **kwargs)
+    
+    def _model_limit(self, model_name: str) -> AdaptiveLimiter:
+        if model_name not in self._model_limits:
+            self._model_limits[model_name] = AdaptiveLimiter()
+        return self._model_limits[model_name]
+    
+    async def _send(self, model_name: str, inputs: List[str]) -> tuple:
+        """One inference call under the model's adaptive limit; returns (response, retry delay)"""
+        limiter = self._model_limit(model_name)
+        await limiter.acquire()
+        # No host-wide semaphore here: it would cap every model's limit together
+        # and count local queueing as upstream latency
+        started = time.monotonic()
+        overloaded, delay = False, None
+        try:
+            response = await self._get_client().post(f"{self.base_url}/{model_name}", json={"inputs": inputs})
+            if response.status_code in _OVERLOAD_STATUS:
+                overloaded, delay = True, retry_delay(response)
+            return response, delay
+        except httpx.TimeoutException:
+            overloaded = True
+            raise
+        finally:
+            limiter.release(started, overloaded, delay)
+    
+    async def translate(self, model_name: str, inputs: List[str]) -> List[str]:
+        """
+        Send one list-valued payload to the inference API and return translations in order.
+        
+        429/503 (throttled or model loading) and timeouts are retried after
+        Retry-After / estimated_time, or with jittered backoff, up to
+        HF_MAX_RETRIES; after that they surface as 503/504.
+        """
+        if not self.api_key:
+            raise HTTPException(status_code=500, detail="Hugging Face API key not configured")
+        
+        attempt = 0
+        try:
+            while True:
+                try:
+                    response, delay = await self._send(model_name, inputs)
+                except httpx.TimeoutException as e:
+                    if attempt >= HF_MAX_RETRIES:
+                        logger.error(f"Translation request to {model_name} timed out: {e!r}")
+                        raise HTTPException(status_code=504, detail="Translation service timed out")
+                    response, delay = None, None
+                
+                if response is not None and response.status_code == 200:
+                    result = response.json()
+                    if len(result) != len(inputs):
+                        raise ValueError(f"expected {len(inputs)} translations, got {len(result)}")
+                    return [item.get('translation_text', text) for item, text in zip(result, inputs)]
+                if response is not None and response.status_code not in _OVERLOAD_STATUS:
+                    logger.error(f"Translation API error: {response.status_code} - {response.text}")
+                    raise HTTPException(status_code=500, detail="Translation service temporarily unavailable")
+                
+                attempt += 1
+                if delay is None:
+                    # Exponential backoff with full jitter
+                    delay = random.uniform(0, HF_RETRY_BACKOFF * 2 ** attempt)
+                if response is not None and (attempt > HF_MAX_RETRIES or delay > HF_MAX_RETRY_DELAY):
+                    logger.warning(f"{model_name} still unavailable ({response.status_code}) after {attempt} attempts")
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Translation model is busy or loading, please retry shortly",
+                        headers={"Retry-After": str(math.ceil(delay))}
+                    )
+                logger.info(f"{model_name} overloaded, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                
+        except HTTPException:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Translation request failed: {e}")
+            raise HTTPException(status_code=500, detail="Translation service request failed")
+        except Exception as e:
+            logger.error(f"Translation error: {e}")
+            raise HTTPException(status_code=500, detail="Translation failed")
+    
+    async def warm(self, model_name: str):
+        """Ask the API to load the model and wait for it, instead of answering 503 while cold"""
+        if not self.api_key:
+            raise HTTPException(status_code=500, detail="Hugging Face API key not configured")
+        response = await self._post(
+            f"{self.base_url}/{model_name}",
+            {"inputs": [TRANSLATION_WARMUP_TEXT], "options": {"wait_for_model": True}},
+            timeout=TRANSLATION_WARMUP_TIMEOUT
+        )
+        response.raise_for_status()
+    
+    def stats(self) -> Dict:
+        return {"models": {name: limiter.stats() for name, limiter in self._model_limits.items()}}
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class LocalEngine(TranslationEngine):
+    """
+    MarianMT models served in-process on CPU.
+    
+    Models are loaded once in start(), optionally with int8 dynamic
+    quantization of the linear layers, and run in a small thread pool so
+    generation never blocks the event loop. Requires transformers,
+    sentencepiece and torch.
+    """
+    
+    name = "local"
+    
+    def __init__(self):
+        self._models: Dict[str, tuple] = {}  # model_name -> (tokenizer, model)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.counters = {"calls": 0, "segments": 0, "errors": 0}
+    
+    def _load(self, model_name: str) -> tuple:
+        import torch
+        from transformers import MarianMTModel, MarianTokenizer
+        
+        source = os.path.join(LOCAL_TRANSLATION_MODEL_DIR, model_name) if LOCAL_TRANSLATION_MODEL_DIR else model_name
+        tokenizer = MarianTokenizer.from_pretrained(source)
+        model = MarianMTModel.from_pretrained(source).eval()
+        if LOCAL_TRANSLATION_QUANTIZE:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return tokenizer, model
+    
+    def _generate(self, model_name: str, inputs: List[str]) -> List[str]:
+        import torch
+        
+        tokenizer, model = self._models[model_name]
+        batch = tokenizer(inputs, return_tensors="pt", padding=True, truncation=True)
+        with torch.inference_mode():
+            output = model.generate(**batch, num_beams=LOCAL_TRANSLATION_BEAMS, max_new_tokens=512)
+        return tokenizer.batch_decode(output, skip_special_tokens=True)
+    
+    async def start(self, models: Dict[str, str]):
+        try:
+            import torch
+            import transformers  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Local translation is enabled but transformers/torch are not installed")
+        torch.set_num_threads(LOCAL_TRANSLATION_THREADS)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=LOCAL_TRANSLATION_WORKERS,
+                                                thread_name_prefix="local-translation")
+        loop = asyncio.get_running_loop()
+        for model_key, model_name in models.items():
+            if model_name not in self._models:
+                started = time.perf_counter()
+                self._models[model_name] = await loop.run_in_executor(self._executor, self._load, model_name)
+                logger.info(f"Loaded {model_name} for {model_key} in {time.perf_counter() - started:.1f}s")
+    
+    async def translate(self, model_name: str, inputs: List[str]) -> List[str]:
+        if model_name not in self._models:
+            raise HTTPException(status_code=500, detail="Translation model not loaded")
+        self.counters["calls"] += 1
+        self.counters["segments"] += len(inputs)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._generate, model_name, inputs
+            )
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.error(f"Local translation with {model_name} failed: {e}")
+            raise HTTPException(status_code=500, detail="Translation failed")
+    
+    def stats(self) -> Dict:
+        return {**self.counters, "loaded_models": sorted(self._models)}
+    
+    async def aclose(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._models.clear()
+
+ENGINES = {"remote": RemoteEngine, "local": LocalEngine}
+
+class MicroBatcher:
+    """
+    Merge concurrent translation calls for the same model into shared engine calls.
+    
+    Texts submitted for a model_key are queued for at most max_wait seconds,
+    or until a full batch (max_items / max_bytes) is waiting, then deduplicated,
+    packed and sent together. Each caller gets back its own translations in
+    order. Batches run in their own tasks, so a caller that goes away does not
+    cancel the call other callers are waiting on.
+    """
+    
+    def __init__(self, run: Callable[[str, List[str]], Awaitable[List[str]]],
+                 pack: Callable[[List[str]], List[List[str]]],
+                 max_wait: float, max_items: int, max_bytes: int):
+        self._run = run
+        self._pack = pack
+        self.max_wait = max_wait
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._pending: Dict[str, Dict[str, List[asyncio.Future]]] = {}
+        self._pending_bytes: Dict[str, int] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters = {"submitted": 0, "batches": 0, "engine_calls": 0, "segments": 0,
+                         "full_flushes": 0, "timer_flushes": 0}
+    
+    async def submit(self, model_key: str, texts: List[str]) -> List[str]:
+        if self.max_wait <= 0:
+            return await self._run(model_key, texts)
+        
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(model_key, {})
+        futures = []
+        for text in texts:
+            if text not in pending:
+                pending[text] = []
+                self._pending_bytes[model_key] = self._pending_bytes.get(model_key, 0) + len(text.encode('utf-8'))
+            future = loop.create_future()
+            pending[text].append(future)
+            futures.append(future)
+        self.counters["submitted"] += 1
+        
+        if len(pending) >= self.max_items or self._pending_bytes[model_key] >= self.max_bytes:
+            self.counters["full_flushes"] += 1
+            self._flush(model_key)
+        elif model_key not in self._timers:
+            self._timers[model_key] = loop.call_later(self.max_wait, self._flush_on_timer, model_key)
+        return list(await asyncio.gather(*futures))
+    
+    def _flush_on_timer(self, model_key: str):
+        self.counters["timer_flushes"] += 1
+        self._flush(model_key)
+    
+    def _flush(self, model_key: str):
+        timer = self._timers.pop(model_key, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(model_key, None)
+        self._pending_bytes.pop(model_key, None)
+        if pending:
+            task = asyncio.create_task(self._run_batch(model_key, pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, model_key: str, pending: Dict[str, List[asyncio.Future]]):
+        # Skip texts whose callers have all gone away
+        texts = [text for text, futures in pending.items() if not all(f.done() for f in futures)]
+        packs = self._pack(texts)
+        self.counters["batches"] += 1
+        self.counters["engine_calls"] += len(packs)
+        self.counters["segments"] += len(texts)
+        results = await asyncio.gather(*(self._run(model_key, pack) for pack in packs), return_exceptions=True)
+        for pack, result in zip(packs, results):
+            for index, text in enumerate(pack):
+                for future in pending[text]:
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                        future.exception()  # mark retrieved; gather only reports the first
+                    else:
+                        future.set_result(result[index])
+    
+    def stats(self) -> Dict:
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "avg_batch_segments": round(self.counters["segments"] / batches, 2) if batches else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+    
+    async def aclose(self):
+        for model_key in list(self._timers):
+            self._timers.pop(model_key).cancel()
+        for pending in self._pending.values():
+            for futures in pending.values():
+                for future in futures:
+                    future.cancel()
+        self._pending.clear()
+        self._pending_bytes.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one engine and model.
+    
+    After failure_threshold consecutive failures the breaker opens and calls
+    fail fast for reset_after seconds. Then a single probe is let through:
+    success closes the breaker, failure opens it again.
+    """
+    
+    def __init__(self, failure_threshold: int = TRANSLATION_BREAKER_FAILURES,
+                 reset_after: float = TRANSLATION_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.counters = {"opened": 0, "rejected": 0}
+    
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_after:
+            self.state = "half_open"
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.counters["rejected"] += 1
+        return False
+    
+    def retry_after(self) -> float:
+        return max(self.reset_after - (time.monotonic() - self._opened_at), 1.0)
+    
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.counters["opened"] += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+    
+    def record_cancel(self):
+        """A call was abandoned before it finished: free the probe slot without judging"""
+        self._probing = False
+    
+    def stats(self) -> Dict:
+        return {**self.counters, "state": self.state, "failures": self.failures}
+
+class LatencyWindow:
+    """Recent call latencies for one model, for picking the hedge delay"""
+    
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+    
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self._samples) < TRANSLATION_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+class ModelWarmer:
+    """
+    Background warm-up and keep-alive for translation models.
+    
+    start() warms every model, TRANSLATION_WARMUP_CONCURRENCY at a time,
+    without holding up startup. Afterwards models that saw traffic within
+    TRANSLATION_KEEPALIVE_WINDOW are pinged each TRANSLATION_KEEPALIVE_INTERVAL,
+    skipping any that served a call since the last round or whose breaker is open.
+    """
+    
+    def __init__(self, translator: "AITranslator"):
+        self.translator = translator
+        self.models: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        for model_key in translator.translation_models:
+            self._model(model_key)
+    
+    def _model(self, model_key: str) -> Dict:
+        if model_key not in self.models:
+            self.models[model_key] = {"last_used": None, "last_success": None, "cold": True,
+                                      "warmups": 0, "warmup_failures": 0, "last_warmup_ms": None}
+        return self.models[model_key]
+    
+    def record_use(self, model_key: str):
+        """Real traffic for a model (keep-alive pings do not count)"""
+        self._model(model_key)["last_used"] = time.time()
+    
+    def record_result(self, model_key: str, ok: bool):
+        model = self._model(model_key)
+        if ok:
+            model["last_success"] = time.time()
+            model["cold"] = False
+        else:
+            model["cold"] = True
+    
+    def state(self, model_key: str) -> str:
+        model = self._model(model_key)
+        if model["cold"] or model["last_success"] is None:
+            return "cold"
+        if time.time() - model["last_success"] > TRANSLATION_MODEL_IDLE_TTL:
+            return "cold"
+        return "warm"
+    
+    async def warm(self, model_key: str):
+        model = self._model(model_key)
+        engine = self.translator.pair_engines[model_key]
+        if self.translator._breaker(engine, model_key).state == "open":
+            return
+        started = time.monotonic()
+        try:
+            await engine.warm(self.translator.translation_models[model_key])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            model["warmup_failures"] += 1
+            self.record_result(model_key, False)
+            logger.warning(f"Warm-up of {model_key} failed: {e!r}")
+            return
+        model["warmups"] += 1
+        model["last_warmup_ms"] = round((time.monotonic() - started) * 1000, 1)
+        self.record_result(model_key, True)
+    
+    async def _warm_many(self, model_keys: List[str]):
+        limit = asyncio.Semaphore(TRANSLATION_WARMUP_CONCURRENCY)
+        
+        async def warm_one(model_key: str):
+            async with limit:
+                await self.warm(model_key)
+        
+        await asyncio.gather(*(warm_one(model_key) for model_key in model_keys))
+    
+    def _due(self) -> List[str]:
+        now = time.time()
+        return [
+            model_key for model_key, model in self.models.items()
+            if model["last_used"] is not None and now - model["last_used"] <= TRANSLATION_KEEPALIVE_WINDOW
+            and (model["last_success"] is None or now - model["last_success"] >= TRANSLATION_KEEPALIVE_INTERVAL)
+        ]
+    
+    async def _run(self):
+        await self._warm_many(list(self.translator.translation_models))
+        logger.info(f"Translation models warm: {sum(self.state(k) == 'warm' for k in self.models)}/{len(self.models)}")
+        while True:
+            await asyncio.sleep(TRANSLATION_KEEPALIVE_INTERVAL)
+            try:
+                await self._warm_many(self._due())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Translation keep-alive round failed: {e}")
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    def stats(self) -> Dict:
+        now = time.time()
+        return {
+            model_key: {
+                "state": self.state(model_key),
+                "idle_seconds": round(now - model["last_used"], 1) if model["last_used"] else None,
+                "warmups": model["warmups"],
+                "warmup_failures": model["warmup_failures"],
+                "last_warmup_ms": model["last_warmup_ms"],
+            }
+            for model_key, model in self.models.items()
+        }
+
+class AITranslator:
+    def __init__(self):
+        self._content_client: Optional[httpx.AsyncClient] = None
+        
+        # Two-tier translation cache: shared cache backend in front of the translation_cache table
+        self.cache = Cache("translations", ttl=TRANSLATION_CACHE_TTL)
+        self.cache_stats = {"shared_hits": 0, "db_hits": 0, "misses": 0, "db_errors": 0}
         
         # Pre-trained translation models for different language pairs
         self.translation_models = {
@@ -22,6 +802,282 @@ class AITranslator:
             "en-zh": "Helsinki-NLP/opus-mt-en-zh",  # English to Chinese
             "zh-en": "Helsinki-NLP/opus-mt-zh-en",  # Chinese to English
         }
+        
+        # Engine serving each language pair, and the alternate that hedged calls go to
+        self.engines: Dict[str, TranslationEngine] = {}
+        self.pair_engines: Dict[str, TranslationEngine] = {}
+        self.hedge_engines: Dict[str, TranslationEngine] = {}
+        for model_key in self.translation_models:
+            engine = self._engine("local" if model_key in LOCAL_TRANSLATION_PAIRS else TRANSLATION_ENGINE)
+            self.pair_engines[model_key] = engine
+            if TRANSLATION_HEDGE and TRANSLATION_HEDGE_ENGINE:
+                self.hedge_engines[model_key] = self._engine(TRANSLATION_HEDGE_ENGINE)
+        
+        self.breakers: Dict[tuple, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyWindow] = {}
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0, "failovers": 0}
+        
+        # Warm/cold state per model, plus startup warm-up and keep-alive pings
+        self.warmer = ModelWarmer(self)
+        
+        # Concurrent callers for the same model share engine calls
+        self.batcher = MicroBatcher(self._run_engine, self._pack, TRANSLATION_BATCH_MAX_WAIT_MS / 1000,
+                                    HF_BATCH_MAX_ITEMS, HF_BATCH_MAX_BYTES)
+    
+    def _engine(self, name: str) -> TranslationEngine:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown translation engine: {name}")
+        if name not in self.engines:
+            self.engines[name] = ENGINES[name]()
+        return self.engines[name]
+    
+    async def start(self):
+        """Load models for in-process engines and start warming models (called from the app lifespan)"""
+        for engine in self.engines.values():
+            await engine.start({
+                model_key: model_name for model_key, model_name in self.translation_models.items()
+                if self.pair_engines[model_key] is engine or self.hedge_engines.get(model_key) is engine
+            })
+        if TRANSLATION_WARMUP:
+            self.warmer.start()
+    
+    @staticmethod
+    def _cache_key(text: str, model_key: str) -> tuple:
+        return (model_key, hashlib.sha256(text.encode('utf-8')).hexdigest())
+    
+    async def _cache_get_many(self, texts: List[str], model_key: str) -> Dict[str, str]:
+        """Look up translations in the shared cache, then in Postgres; returns only the hits"""
+        found: Dict[str, str] = {}
+        pending: Dict[str, str] = {}  # content_hash -> text
+        keys = [self._cache_key(text, model_key) for text in texts]
+        for text, key, translated in zip(texts, keys, await self.cache.get_many(keys)):
+            if translated is not None:
+                self.cache_stats["shared_hits"] += 1
+                found[text] = translated
+            else:
+                pending[key[1]] = text
+        
+        if pending and TRANSLATION_CACHE_PERSIST:
+            try:
+                async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+                    rows = await conn.fetch(
+                        """
+                        UPDATE translation_cache
+                        SET hit_count = hit_count + 1, last_used_at = CURRENT_TIMESTAMP
+                        WHERE model_key = $1 AND content_hash = ANY($2::char(64)[])
+                        RETURNING content_hash, translated_text
+                        """,
+                        model_key, list(pending)
+                    )
+            except Exception as e:
+                self.cache_stats["db_errors"] += 1
+                logger.warning(f"Translation cache lookup failed: {e}")
+                rows = []
+            promoted = {}
+            for row in rows:
+                text = pending.pop(row["content_hash"])
+                self.cache_stats["db_hits"] += 1
+                promoted[(model_key, row["content_hash"])] = row["translated_text"]
+                found[text] = row["translated_text"]
+            if promoted:
+                await self.cache.set_many(promoted)
+        
+        self.cache_stats["misses"] += len(pending)
+        return found
+    
+    async def _cache_set_many(self, translations: Dict[str, str], model_key: str):
+        """Store translations in both cache tiers; persistence failures are non-fatal"""
+        records = []
+        shared = {}
+        for text, translated in translations.items():
+            key = self._cache_key(text, model_key)
+            shared[key] = translated
+            records.append((*key, translated))
+        if shared:
+            await self.cache.set_many(shared)
+        
+        if records and TRANSLATION_CACHE_PERSIST:
+            try:
+                async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+                    await conn.executemany(
+                        """
+                        INSERT INTO translation_cache (model_key, content_hash, translated_text)
+                        VALUES ($1, $2, $3)
+                        ON CONFLICT (model_key, content_hash)
+                        DO UPDATE SET translated_text = EXCLUDED.translated_text,
+                                      last_used_at = CURRENT_TIMESTAMP
+                        """,
+                        records
+                    )
+            except Exception as e:
+                self.cache_stats["db_errors"] += 1
+                logger.warning(f"Translation cache write failed: {e}")
+    
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters for the translation cache"""
+        lookups = self.cache_stats["shared_hits"] + self.cache_stats["db_hits"] + self.cache_stats["misses"]
+        hits = lookups - self.cache_stats["misses"]
+        return {
+            **self.cache_stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "shared": self.cache.stats(),
+        }
+    
+    def get_engine_stats(self) -> Dict:
+        """Engine serving each language pair, plus per-engine counters"""
+        return {
+            "pairs": {model_key: engine.name for model_key, engine in self.pair_engines.items()},
+            "models": self.warmer.stats(),
+            "engines": {name: engine.stats() for name, engine in self.engines.items()},
+            "batching": self.batcher.stats(),
+            "breakers": {f"{name}:{model_key}": breaker.stats()
+                         for (name, model_key), breaker in self.breakers.items()},
+            "hedging": {
+                **self.hedge_stats,
+                "enabled": TRANSLATION_HEDGE,
+                "delay_ms": {
+                    model_key: round(delay * 1000, 1) for model_key, window in self.latencies.items()
+                    if (delay := window.percentile(TRANSLATION_HEDGE_PERCENTILE)) is not None
+                },
+            },
+        }
+    
+    async def aclose(self):
+        """Close engines and the shared HTTP client (called from the app lifespan)"""
+        await self.warmer.stop()
+        await self.batcher.aclose()
+        for engine in self.engines.values():
+            await engine.aclose()
+        if self._content_client is not None:
+            await self._content_client.aclose()
+            self._content_client = None
+    
+    def _resolve_model(self, source_language: str, target_language: str) -> tuple:
+        """Return (model_key, model_name) for a language pair, or raise 400"""
+        model_key = f"{source_language}-{target_language}"
+        if model_key not in self.translation_models:
+            raise HTTPException(status_code=400, detail=f"Translation from {source_language} to {target_language} not supported")
+        return model_key, self.translation_models[model_key]
+    
+    def _breaker(self, engine: TranslationEngine, model_key: str) -> CircuitBreaker:
+        key = (engine.name, model_key)
+        if key not in self.breakers:
+            self.breakers[key] = CircuitBreaker()
+        return self.breakers[key]
+    
+    async def _call_engine(self, engine: TranslationEngine, model_key: str, inputs: List[str]) -> List[str]:
+        """One engine call, recorded on its breaker; the caller has already passed breaker.allow()"""
+        breaker = self._breaker(engine, model_key)
+        started = time.monotonic()
+        try:
+            result = await engine.translate(self.translation_models[model_key], inputs)
+        except asyncio.CancelledError:
+            breaker.record_cancel()
+            raise
+        except HTTPException as e:
+            if e.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if e.status_code == 503 and engine is self.pair_engines[model_key]:
+                self.warmer.record_result(model_key, False)
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        if engine is self.pair_engines[model_key]:
+            self.warmer.record_result(model_key, True)
+        self.latencies.setdefault(model_key, LatencyWindow()).add(time.monotonic() - started)
+        return result
+    
+    async def _run_engine(self, model_key: str, inputs: List[str]) -> List[str]:
+        """
+        Translate one pack of texts with the engine serving this language pair.
+        
+        Fails fast while the engine's breaker is open (or fails over to the
+        hedge engine, if one is configured), and hedges calls that run past
+        the model's latency percentile.
+        """
+        primary = self.pair_engines[model_key]
+        alternate = self.hedge_engines.get(model_key)
+        self.warmer.record_use(model_key)
+        breaker = self._breaker(primary, model_key)
+        if not breaker.allow():
+            if alternate is not None and self._breaker(alternate, model_key).allow():
+                self.hedge_stats["failovers"] += 1
+                return await self._call_engine(alternate, model_key, inputs)
+            raise HTTPException(
+                status_code=503,
+                detail="Translation service is unavailable, please retry shortly",
+                headers={"Retry-After": str(math.ceil(breaker.retry_after()))}
+            )
+        
+        window = self.latencies.get(model_key)
+        delay = window.percentile(TRANSLATION_HEDGE_PERCENTILE) if TRANSLATION_HEDGE and window else None
+        if delay is None:
+            return await self._call_engine(primary, model_key, inputs)
+        
+        tasks = [asyncio.ensure_future(self._call_engine(primary, model_key, inputs))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return tasks[0].result()
+            hedge = alternate or primary
+            if not self._breaker(hedge, model_key).allow():
+                return await tasks[0]
+            self.hedge_stats["hedged"] += 1
+            tasks.append(asyncio.ensure_future(self._call_engine(hedge, model_key, inputs)))
+            
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            self.hedge_stats["hedge_wins"] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _infer(self, model_key: str, inputs: List[str]) -> List[str]:
+        """Translate texts, sharing engine calls with concurrent callers for the same model"""
+        return await self.batcher.submit(model_key, inputs)
+    
+    @staticmethod
+    def _pack(texts: List[str]) -> List[List[str]]:
+        """Group texts into packs bounded by item count and UTF-8 byte size"""
+        packs: List[List[str]] = []
+        current: List[str] = []
+        current_bytes = 0
+        for text in texts:
+            size = len(text.encode('utf-8'))
+            if current and (len(current) >= HF_BATCH_MAX_ITEMS or current_bytes + size > HF_BATCH_MAX_BYTES):
+                packs.append(current)
+                current, current_bytes = [], 0
+            current.append(text)
+            current_bytes += size
+        if current:
+            packs.append(current)
+        return packs
+    
+    async def _translate_many(self, texts: List[str], model_key: str) -> Dict[str, str]:
+        """Translate unique texts through the cache, packing misses into concurrent requests"""
+        translations = await self._cache_get_many(texts, model_key)
+        misses = [text for text in texts if text not in translations]
+        if misses:
+            packs = self._pack(misses)
+            results = await asyncio.gather(*(self._infer(model_key, pack) for pack in packs))
+            fresh = {}
+            for pack, translated in zip(packs, results):
+                fresh.update(zip(pack, translated))
+            await self._cache_set_many(fresh, model_key)
+            translations.update(fresh)
+        return translations
     
     async def translate_text(self, text: str, target_language: str, source_language: str = "en") -> Dict:
         """
@@ -35,49 +1091,178 @@ class AITranslator:
         Returns:
             Dict containing translated text and metadata
         """
-        if not self.api_key:
-            raise HTTPException(status_code=500, detail="Hugging Face API key not configured")
+        model_key, model_name = self._resolve_model(source_language, target_language)
         
-        # Determine model to use
-        model_key = f"{source_language}-{target_language}"
-        if model_key not in self.translation_models:
-            raise HTTPException(status_code=400, detail=f"Translation from {source_language} to {target_language} not supported")
+        cached = await self._cache_get_many([text], model_key)
+        if text in cached:
+            translated_text = cached[text]
+        else:
+            translated_text = (await self._infer(model_key, [text]))[0]
+            await self._cache_set_many({text: translated_text}, model_key)
+        
+        return {
+            "original_text": text,
+            "translated_text": translated_text,
+            "source_language": source_language,
+            "target_language": target_language,
+            "model_used": model_name,
+            "confidence": 0.95,  # Mock confidence score
+            "cached": text in cached
+        }
+    
+    async def translate_batch(self, texts: List[str], target_language: str,
+                              source_language: str = "en") -> Dict:
+        """
+        Translate many segments with as few model calls as possible
+        
+        Duplicate segments are translated once, cached segments skip the model,
+        and the remainder is packed into list-valued requests sent concurrently.
+        
+        Args:
+            texts: Segments to translate
+            target_language: Target language code
+            source_language: Source language code (default: 'en')
+        
+        Returns:
+            Dict containing translations in the same order as the input
+        """
+        model_key, model_name = self._resolve_model(source_language, target_language)
         
-        model_name = self.translation_models[model_key]
+        unique = list(dict.fromkeys(texts))
+        translations = await self._translate_many(unique, model_key)
         
+        return {
+            "translations": [translations[text] for text in texts],
+            "source_language": source_language,
+            "target_language": target_language,
+            "model_used": model_name,
+            "segments": len(texts),
+            "unique_segments": len(unique)
+        }
+    
+    async def _fetch_resource_content(self, resource) -> str:
+        """Resource text: the linked file for plain-text types, otherwise title and description"""
+        fallback = "\n\n".join(part for part in (resource["title"], resource["description"]) if part)
+        if (resource["file_type"] or "").lower() not in TEXT_FILE_TYPES or not resource["file_url"]:
+            return fallback
+        
+        # Separate client so the inference API key is never sent to file hosts.
+        # Redirects are followed by hand so every hop is checked before it is fetched.
+        if self._content_client is None or self._content_client.is_closed:
+            self._content_client = httpx.AsyncClient(timeout=httpx.Timeout(HF_TIMEOUT), follow_redirects=False)
         try:
-            headers = {"Authorization": f"Bearer {self.api_key}"}
-            payload = {"inputs": text}
-            
-            response = requests.post(
-                f"{self.base_url}/{model_name}",
-                headers=headers,
-                json=payload,
-                timeout=30
+            url = resource["file_url"]
+            for _ in range(RESOURCE_FETCH_MAX_REDIRECTS + 1):
+                await check_fetch_url(url)
+                async with self._content_client.stream("GET", url) as response:
+                    if response.is_redirect:
+                        url = str(response.url.join(response.headers["location"]))
+                        continue
+                    response.raise_for_status()
+                    chunks, size = [], 0
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > RESOURCE_MAX_BYTES:
+                            raise ValueError(f"resource content exceeds {RESOURCE_MAX_BYTES} bytes")
+                        chunks.append(chunk)
+                    return b"".join(chunks).decode("utf-8", errors="replace")
+            raise ValueError(f"more than {RESOURCE_FETCH_MAX_REDIRECTS} redirects")
+        except Exception as e:
+            logger.warning(f"Could not fetch content for resource {resource['id']}, using description: {e}")
+            return fallback
+    
+    async def stream_resource_translation(self, resource_id: int, target_language: str,
+                                          source_language: str = "en") -> AsyncIterator[Dict]:
+        """
+        Translate a resource segment by segment, yielding progress events
+        
+        Events are dicts with an "event" key: "started" (segment count),
+        "segment" (one translated segment and overall progress), then
+        "completed" with the stored translation id, or "error" (status_code,
+        detail and headers of the failure).
+        """
+        model_key, model_name = self._resolve_model(source_language, target_language)
+        
+        async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+            resource = await conn.fetchrow(
+                """
+                SELECT id, title, description, file_url, file_type
+                FROM resources WHERE id = $1 AND is_active = TRUE
+                """,
+                resource_id
             )
+        if not resource:
+            raise HTTPException(status_code=404, detail="Resource not found")
+        
+        paragraphs = split_segments(await self._fetch_resource_content(resource))
+        segments = [sentence for paragraph in paragraphs for sentence in paragraph]
+        positions: Dict[str, List[int]] = {}
+        for index, segment in enumerate(segments):
+            positions.setdefault(segment, []).append(index)
+        
+        translated: List[Optional[str]] = [None] * len(segments)
+        done = 0
+        yield {"event": "started", "resource_id": resource_id, "segments": len(segments),
+               "model_used": model_name}
+        
+        def emit(results: Dict[str, str]):
+            nonlocal done
+            for text, translation in results.items():
+                for index in positions[text]:
+                    translated[index] = translation
+                    done += 1
+                    yield {"event": "segment", "index": index, "translated_text": translation,
+                           "completed": done, "total": len(segments)}
+        
+        try:
+            cached = await self._cache_get_many(list(positions), model_key)
+            for event in emit(cached):
+                yield event
             
-            if response.status_code == 200:
-                result = response.json()
-                translated_text = result[0].get('translation_text', text)
-                
-                return {
-                    "original_text": text,
-                    "translated_text": translated_text,
-                    "source_language": source_language,
-                    "target_language": target_language,
-                    "model_used": model_name,
-                    "confidence": 0.95  # Mock confidence score
-                }
-            else:
-                logger.error(f"Translation API error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=500, detail="Translation service temporarily unavailable")
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Translation request failed: {e}")
-            raise HTTPException(status_code=500, detail="Translation service request failed")
-        except Exception as e:
-            logger.error(f"Translation error: {e}")
-            raise HTTPException(status_code=500, detail="Translation failed")
+            misses = [text for text in positions if text not in cached]
+            limit = asyncio.Semaphore(RESOURCE_TRANSLATION_CONCURRENCY)
+            
+            async def run_pack(pack: List[str]) -> Dict[str, str]:
+                async with limit:
+                    results = dict(zip(pack, await self._infer(model_key, pack)))
+                await self._cache_set_many(results, model_key)
+                return results
+            
+            tasks = [asyncio.ensure_future(run_pack(pack)) for pack in self._pack(misses)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    for event in emit(await next_done):
+                        yield event
+            finally:
+                for task in tasks:
+                    task.cancel()
+            
+            # Reassemble paragraphs in their original order
+            content, cursor = [], 0
+            for paragraph in paragraphs:
+                content.append(" ".join(translated[cursor:cursor + len(paragraph)]))
+                cursor += len(paragraph)
+            translated_content = "\n\n".join(content)
+            summary = await self.generate_summary(translated_content, target_language)
+            
+            async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+                translation_id = await conn.fetchval(
+                    """
+                    INSERT INTO translations (resource_id, original_language, target_language,
+                                              translated_content, summary)
+                    VALUES ($1, $2, $3, $4, $5)
+                    RETURNING id
+                    """,
+                    resource_id, source_language, target_language, translated_content, summary
+                )
+        except HTTPException as e:
+            # Keep the status and headers (e.g. 503 + Retry-After) so callers can re-raise them
+            yield {"event": "error", "status_code": e.status_code, "detail": e.detail,
+                   "headers": dict(e.headers or {})}
+            return
+        
+        yield {"event": "completed", "resource_id": resource_id, "translation_id": translation_id,
+               "translated_content": translated_content, "summary": summary}
     
     async def translate_resource(self, resource_id: int, target_language: str, 
                                source_language: str = "en") -> Dict:
@@ -92,16 +1277,20 @@ class AITranslator:
         Returns:
             Dict containing translation details
         """
-        # This would typically fetch the resource from database
-        # For now, we'll return a mock response
-        return {
-            "resource_id": resource_id,
-            "translation_status": "completed",
-            "target_language": target_language,
-            "translated_content": f"Translated content for resource {resource_id}",
-            "audio_url": None,  # Could be generated using text-to-speech
-            "summary": f"Summary of translated resource {resource_id}"
-        }
+        async for event in self.stream_resource_translation(resource_id, target_language, source_language):
+            if event["event"] == "error":
+                raise HTTPException(status_code=event["status_code"], detail=event["detail"],
+                                    headers=event["headers"] or None)
+            if event["event"] == "completed":
+                return {
+                    "resource_id": resource_id,
+                    "translation_id": event["translation_id"],
+                    "translation_status": "completed",
+                    "target_language": target_language,
+                    "translated_content": event["translated_content"],
+                    "audio_url": None,  # Could be generated using text-to-speech
+                    "summary": event["summary"]
+                }
     
     async def get_supported_languages(self) -> List[Dict]:
         """Get list of supported languages for translation"""
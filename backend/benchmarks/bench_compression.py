@@ -0,0 +1,62 @@
+"""
+CPU cost against bytes saved for each gzip level / brotli quality, on
+payloads shaped like GET /resources pages and translation responses.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_compression [--repeat 50]
+"""
+import argparse
+import time
+
+from backend import serialization
+from backend.benchmarks.bench_serialization import make_rows
+from backend.compression import _Compressor, brotli
+from backend.main import DEFAULT_RESOURCE_FIELDS
+
+SENTENCE = ("Photosynthesis is the process by which green plants use sunlight, water "
+            "and carbon dioxide to make their own food and release oxygen. ")
+
+def payloads() -> dict:
+    page = lambda n: serialization.dumps({
+        "items": [{f: row[f] for f in DEFAULT_RESOURCE_FIELDS} for row in make_rows(n)],
+        "next_cursor": "WyIyMDI0LTAxLTAxVDAwOjAwOjAwKzAwOjAwIiwgMTIzXQ", "has_more": True,
+    })
+    segments = [f"{SENTENCE}({i})" for i in range(200)]
+    return {
+        "resources page (20)": page(20),
+        "resources page (100)": page(100),
+        "translate/batch (200 seg)": serialization.dumps({
+            "translations": [s.replace("plants", "mimea") for s in segments],
+            "source_language": "en", "target_language": "sw", "model_used": "Helsinki-NLP/opus-mt-en-sw",
+            "segments": len(segments), "unique_segments": len(segments),
+        }),
+        "translate/resource ndjson": b"".join(serialization.dumps(
+            {"event": "segment", "index": i, "total": 200, "translated": s}
+        ) + b"\n" for i, s in enumerate(segments)),
+    }
+
+def bench(payload: bytes, encoding: str, level: int, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressor = _Compressor(encoding, gzip_level=level, brotli_quality=level)
+        size = len(compressor.compress(payload) + compressor.finish())
+    return (time.perf_counter() - start) / repeat * 1000, size
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    settings = [("gzip", level) for level in (1, 6, 9)]
+    if brotli is not None:
+        settings += [("br", quality) for quality in (1, 4, 6, 11)]
+
+    print(f"{'payload':<28} {'codec':<8} {'bytes in':>9} {'bytes out':>10} {'saved':>7} {'ms':>8} {'MB/s':>8}")
+    for name, payload in payloads().items():
+        for encoding, level in settings:
+            ms, size = bench(payload, encoding, level, args.repeat)
+            print(f"{name:<28} {encoding + '-' + str(level):<8} {len(payload):>9} {size:>10} "
+                  f"{1 - size / len(payload):>6.1%} {ms:>8.3f} {len(payload) / ms / 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Login throughput per core at each bcrypt cost, and event-loop responsiveness
+while a burst of logins is hashed in the password executor.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_password_hashing [--rounds 8 10 12] [--logins 64]
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+async def loop_lag_during(burst) -> float:
+    """Worst delay seen by a 1ms ticker on the event loop while burst runs"""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst = max(worst, time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await burst
+    done = True
+    await task
+    return worst
+
+async def bench(rounds: int, logins: int, workers: int):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash("correct horse battery staple")
+
+    start = time.perf_counter()
+    for _ in range(max(logins // 8, 3)):
+        context.verify("correct horse battery staple", hashed)
+    per_login = (time.perf_counter() - start) / max(logins // 8, 3)
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        burst = asyncio.gather(*(
+            loop.run_in_executor(executor, context.verify, "correct horse battery staple", hashed)
+            for _ in range(logins)
+        ))
+        start = time.perf_counter()
+        lag = await loop_lag_during(burst)
+        elapsed = time.perf_counter() - start
+
+    print(f"{rounds:>6} {per_login * 1000:>10.1f} {1 / per_login:>14.1f} "
+          f"{logins / elapsed:>16.1f} {lag * 1000:>12.1f}")
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[8, 10, 12])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    print(f"workers={args.workers} logins per burst={args.logins}")
+    print(f"{'rounds':>6} {'ms/login':>10} {'logins/s/core':>14} "
+          f"{'burst logins/s':>16} {'loop lag ms':>12}")
+    for rounds in args.rounds:
+        await bench(rounds, args.logins, args.workers)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Cost of serializing a page of resources, per 1,000 rows, for the old path
+(ResourceOut validation + jsonable_encoder + stdlib json) against the direct
+encoder the routes now use, with and without orjson.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_serialization [--rows 1000] [--repeat 20]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from backend import serialization
+from backend.main import ResourceOut
+
+def make_rows(count: int) -> list:
+    """Dicts shaped like asyncpg records from SELECT * FROM resources"""
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": i,
+        "teacher_id": i % 97,
+        "title": f"Fractions and decimals worksheet {i}",
+        "description": "Practice problems with worked answers for upper primary classes. " * 3,
+        "subject": "mathematics",
+        "grade_level": "grade 6",
+        "language": "english",
+        "file_url": f"https://cdn.example.org/resources/{i}.pdf",
+        "file_type": "pdf",
+        "price": Decimal("4.99"),
+        "tags": {"topics": ["fractions", "decimals"], "curriculum": "CBC"},
+        "download_count": i * 3,
+        "is_active": True,
+        "created_at": now - timedelta(minutes=i),
+    } for i in range(count)]
+
+def validated_stdlib(rows: list) -> bytes:
+    items = [ResourceOut(**row) for row in rows]
+    return json.dumps(jsonable_encoder({"items": items})).encode()
+
+def direct_stdlib(rows: list) -> bytes:
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.dumps({"items": rows})
+    finally:
+        serialization.orjson = orjson
+
+def direct_orjson(rows: list) -> bytes:
+    return serialization.dumps({"items": rows})
+
+def bench(name: str, encode, rows: list, repeat: int, baseline: float = None) -> float:
+    encode(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = len(encode(rows))
+    per_thousand = (time.perf_counter() - start) / repeat * 1000 / len(rows) * 1000
+    speedup = f"{baseline / per_thousand:>8.1f}x" if baseline else f"{'1.0x':>9}"
+    print(f"{name:<32} {per_thousand:>12.2f} {size:>10} {speedup}")
+    return per_thousand
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"rows={args.rows} repeat={args.repeat} orjson={'yes' if serialization.orjson else 'no'}")
+    print(f"{'path':<32} {'ms/1k rows':>12} {'bytes':>10} {'speedup':>9}")
+    baseline = bench("ResourceOut + jsonable_encoder", validated_stdlib, rows, args.repeat)
+    bench("direct, stdlib json", direct_stdlib, rows, args.repeat, baseline)
+    if serialization.orjson:
+        bench("direct, orjson", direct_orjson, rows, args.repeat, baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class LRUCache:
+    """In-process LRU cache with a size bound, per-entry TTL and hit/miss counters"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# ----------------------------
+# Shared cache backends
+# ----------------------------
+CACHE_URL = os.getenv('CACHE_URL', 'memory://')
+CACHE_MEMORY_SIZE = int(os.getenv('CACHE_MEMORY_SIZE', '50000'))
+CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'translearn')
+# How long a worker trusts its copy of a namespace version before re-reading it;
+# bounds how stale other workers can be after an invalidation
+CACHE_VERSION_TTL = float(os.getenv('CACHE_VERSION_TTL', '1'))
+
+class CacheBackend(ABC):
+    """Async key/value store holding JSON-serializable values"""
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        ...
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float]):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def get_int(self, key: str) -> int:
+        ...
+
+    async def aclose(self):
+        pass
+
+class MemoryBackend(CacheBackend):
+    """Per-process backend on top of LRUCache"""
+
+    def __init__(self, maxsize: int = CACHE_MEMORY_SIZE):
+        self._lru = LRUCache(maxsize=maxsize)
+        self._counters: Dict[str, int] = {}
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        return [self._lru.get(key) for key in keys]
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float]):
+        for key, value in items.items():
+            self._lru.set(key, value, ttl)
+
+    async def delete(self, key: str):
+        self._lru.delete(key)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def get_int(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+class RedisBackend(CacheBackend):
+    """Backend for any server speaking the Redis protocol, shared by all workers"""
+
+    def __init__(self, url: Optional[str] = None, client: Any = None):
+        """Connect to url, or use an existing redis.asyncio-compatible client (e.g. fakeredis in tests)"""
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("CACHE_URL points at Redis but the 'redis' package is not installed")
+            client = redis.from_url(url)
+        self._redis = client
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        if not keys:
+            return []
+        return [None if raw is None else json.loads(raw) for raw in await self._redis.mget(keys)]
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+            await pipe.execute()
+
+    async def delete(self, key: str):
+        await self._redis.delete(key)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+    async def get_int(self, key: str) -> int:
+        return int(await self._redis.get(key) or 0)
+
+    async def aclose(self):
+        await self._redis.aclose()
+
+_backend: Optional[CacheBackend] = None
+
+def create_backend(url: str) -> CacheBackend:
+    if url.startswith('memory://'):
+        return MemoryBackend()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
+
+def get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend(CACHE_URL)
+    return _backend
+
+async def close_backend():
+    global _backend
+    if _backend is not None:
+        await _backend.aclose()
+        _backend = None
+
+# ----------------------------
+# Namespaced caches
+# ----------------------------
+_caches: Dict[str, "Cache"] = {}
+
+class Cache:
+    """
+    Namespaced view of the shared backend.
+
+    Keys are versioned by a per-namespace counter, so invalidate() drops a whole
+    namespace with one increment. get_or_set() coalesces concurrent loads of the
+    same key within this process (single-flight). Backend errors are logged and
+    treated as misses so the cache never takes a request down.
+    """
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._version: Optional[int] = None
+        self._version_checked = 0.0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counters = {"hits": 0, "misses": 0, "loads": 0, "coalesced": 0, "errors": 0}
+        _caches[namespace] = self
+
+    def _key(self, key: Hashable, version: int) -> str:
+        digest = hashlib.sha256(json.dumps(key, default=str).encode()).hexdigest()
+        return f"{CACHE_KEY_PREFIX}:{self.namespace}:{version}:{digest}"
+
+    async def _current_version(self) -> int:
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked > CACHE_VERSION_TTL:
+            self._version = await get_backend().get_int(f"{CACHE_KEY_PREFIX}:{self.namespace}:version")
+            self._version_checked = now
+        return self._version
+
+    async def get_many(self, keys: List[Hashable], version: Optional[int] = None) -> List[Any]:
+        try:
+            if version is None:
+                version = await self._current_version()
+            values = await get_backend().get_many([self._key(key, version) for key in keys])
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Cache {self.namespace} read failed: {e}")
+            values = [None] * len(keys)
+        hits = sum(value is not None for value in values)
+        self.counters["hits"] += hits
+        self.counters["misses"] += len(keys) - hits
+        return values
+
+    async def get(self, key: Hashable) -> Any:
+        return (await self.get_many([key]))[0]
+
+    async def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None,
+                       version: Optional[int] = None):
+        try:
+            if version is None:
+                version = await self._current_version()
+            await get_backend().set_many(
+                {self._key(key, version): value for key, value in items.items()},
+                self.ttl if ttl is None else ttl
+            )
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Cache {self.namespace} write failed: {e}")
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        await self.set_many({key: value}, ttl)
+
+    async def invalidate(self):
+        """Drop every entry in this namespace, for all workers sharing the backend"""
+        try:
+            self._version = await get_backend().incr(f"{CACHE_KEY_PREFIX}:{self.namespace}:version")
+            self._version_checked = time.monotonic()
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Cache {self.namespace} invalidation failed: {e}")
+
+    async def get_or_set(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                         ttl: Optional[float] = None,
+                         cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached value or run loader once, sharing its result with concurrent callers.
+        
+        The result is stored under the namespace version read before loading,
+        so a load that straddles an invalidate() lands in the dropped version.
+        """
+        try:
+            version = await self._current_version()
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Cache {self.namespace} read failed: {e}")
+            version = None
+        value = (await self.get_many([key], version))[0] if version is not None else None
+        if value is not None:
+            return value
+
+        flight_key = json.dumps(key, default=str)
+        flight = self._inflight.get(flight_key)
+        if flight is not None:
+            self.counters["coalesced"] += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if flight.cancelled():
+                    # The leading caller was cancelled, not us: load it ourselves
+                    return await self.get_or_set(key, loader, ttl, cache_if)
+                raise
+
+        flight = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = flight
+        try:
+            self.counters["loads"] += 1
+            value = await loader()
+            if version is not None and value is not None and (cache_if is None or cache_if(value)):
+                await self.set_many({key: value}, ttl, version)
+            flight.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            flight.exception()  # mark retrieved in case nobody else was waiting
+            raise
+        finally:
+            del self._inflight[flight_key]
+
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+def cache_stats() -> Dict:
+    """Stats for every namespace plus the active backend"""
+    return {
+        "backend": type(get_backend()).__name__,
+        "namespaces": {name: cache.stats() for name, cache in _caches.items()},
+    }
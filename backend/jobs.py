@@ -0,0 +1,268 @@
+import asyncio
+import os
+import logging
+import time
+from typing import Dict, List, Optional
+
+import asyncpg
+from fastapi import HTTPException
+
+from .ai_translator import ai_translator
+from .database import DB_POOL_ACQUIRE_TIMEOUT, create_pool, close_pool, get_pool
+
+logger = logging.getLogger(__name__)
+
+# Worker pool settings (override via environment)
+TRANSLATION_WORKERS = int(os.getenv('TRANSLATION_WORKERS', '2'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+# Running jobs heartbeat every JOB_HEARTBEAT_INTERVAL seconds; one whose last
+# heartbeat is older than JOB_STALE_AFTER belongs to a dead worker
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '10'))
+JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', '120'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+# How often workers look for jobs orphaned by a crashed worker
+JOB_SWEEP_INTERVAL = float(os.getenv('JOB_SWEEP_INTERVAL', '60'))
+# Transient failures (rate limited, breaker open or model loading, timeout) are
+# requeued until JOB_MAX_ATTEMPTS, after Retry-After or JOB_RETRY_DELAY seconds
+JOB_RETRY_STATUSES = {429, 503, 504}
+JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '30'))
+
+JOB_COLUMNS = """
+    id, resource_id, requested_by, source_language, target_language, status,
+    attempts, result, error, created_at, started_at, finished_at, not_before
+"""
+
+async def enqueue_translation_job(conn: asyncpg.Connection, resource_id: int, requested_by: int,
+                                  target_language: str, source_language: str = "en") -> Dict:
+    """Insert a queued job and wake any in-process workers"""
+    ai_translator._resolve_model(source_language, target_language)
+    row = await conn.fetchrow(
+        f"""
+        INSERT INTO translation_jobs (resource_id, requested_by, source_language, target_language)
+        SELECT r.id, $2, $3, $4
+        FROM resources r
+        WHERE r.id = $1 AND r.is_active = TRUE
+        RETURNING {JOB_COLUMNS}
+        """,
+        resource_id, requested_by, source_language, target_language
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    worker_pool.notify()
+    return dict(row)
+
+async def get_translation_job(conn: asyncpg.Connection, job_id: int) -> Optional[Dict]:
+    row = await conn.fetchrow(f"SELECT {JOB_COLUMNS} FROM translation_jobs WHERE id = $1", job_id)
+    return dict(row) if row else None
+
+async def claim_next_job(conn: asyncpg.Connection) -> Optional[Dict]:
+    """Atomically move the oldest queued job to running; concurrent workers skip locked rows"""
+    row = await conn.fetchrow(
+        f"""
+        UPDATE translation_jobs
+        SET status = 'running', started_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP,
+            attempts = attempts + 1
+        WHERE id = (
+            SELECT id FROM translation_jobs
+            WHERE status = 'queued'
+              AND (not_before IS NULL OR not_before <= CURRENT_TIMESTAMP)
+            ORDER BY created_at, id
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING {JOB_COLUMNS}
+        """
+    )
+    return dict(row) if row else None
+
+async def retry_job_later(conn: asyncpg.Connection, job_id: int, error: str, delay: float):
+    """Hand a job that hit a transient failure back to the queue, not claimable for delay seconds"""
+    await conn.execute(
+        """
+        UPDATE translation_jobs
+        SET status = 'queued', started_at = NULL, error = $2,
+            not_before = CURRENT_TIMESTAMP + make_interval(secs => $3)
+        WHERE id = $1
+        """,
+        job_id, error, delay
+    )
+
+def retry_after(e: HTTPException) -> float:
+    """Seconds from an exception's Retry-After header, else JOB_RETRY_DELAY"""
+    try:
+        return max(float((e.headers or {}).get("Retry-After", JOB_RETRY_DELAY)), 0.0)
+    except ValueError:
+        return JOB_RETRY_DELAY
+
+async def requeue_stale_jobs(conn: asyncpg.Connection) -> int:
+    """Return jobs orphaned by a crashed worker to the queue, failing those out of attempts"""
+    await conn.execute(
+        """
+        UPDATE translation_jobs
+        SET status = 'failed', error = 'Exceeded maximum attempts', finished_at = CURRENT_TIMESTAMP
+        WHERE status = 'running' AND attempts >= $2
+          AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => $1)
+        """,
+        JOB_STALE_AFTER, JOB_MAX_ATTEMPTS
+    )
+    result = await conn.execute(
+        """
+        UPDATE translation_jobs
+        SET status = 'queued', started_at = NULL
+        WHERE status = 'running'
+          AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => $1)
+        """,
+        JOB_STALE_AFTER
+    )
+    return int(result.split()[-1])
+
+class TranslationWorkerPool:
+    """Pool of async workers draining the translation_jobs queue"""
+
+    def __init__(self, workers: int = TRANSLATION_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_sweep = 0.0
+
+    def notify(self):
+        """Wake idle workers in this process after an enqueue"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        await self._sweep()
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _sweep(self):
+        """Requeue jobs left running by a crashed worker; runs at start and every JOB_SWEEP_INTERVAL"""
+        self._last_sweep = time.monotonic()
+        async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+            requeued = await requeue_stale_jobs(conn)
+        if requeued:
+            logger.info(f"Requeued {requeued} stale translation jobs")
+            self.notify()
+    
+    async def _run(self, worker_id: int):
+        while True:
+            try:
+                if time.monotonic() - self._last_sweep >= JOB_SWEEP_INTERVAL:
+                    await self._sweep()
+                async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+                    job = await claim_next_job(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Translation worker {worker_id} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The job stays running and is requeued by a later sweep once stale
+                logger.error(f"Translation worker {worker_id} could not finish job {job['id']}: {e}")
+
+    async def _heartbeat(self, job_id: int):
+        """Keep a running job's heartbeat_at fresh so the sweep doesn't hand it to another worker"""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+                    await conn.execute(
+                        "UPDATE translation_jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = $1 AND status = 'running'",
+                        job_id
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not record heartbeat for translation job {job_id}: {e}")
+
+    async def _process(self, job: Dict):
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+        try:
+            result = await ai_translator.translate_resource(
+                job["resource_id"], job["target_language"], job["source_language"]
+            )
+            status, error = "done", None
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back to the queue for another worker
+            try:
+                async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+                    await conn.execute(
+                        "UPDATE translation_jobs SET status = 'queued', started_at = NULL WHERE id = $1",
+                        job["id"]
+                    )
+            except Exception as e:
+                logger.error(f"Could not requeue translation job {job['id']} on shutdown: {e}")
+            raise
+        except HTTPException as e:
+            if e.status_code in JOB_RETRY_STATUSES and job["attempts"] < JOB_MAX_ATTEMPTS:
+                await self._retry_later(job, str(e.detail), retry_after(e))
+                return
+            result, status, error = None, "failed", str(e.detail)
+        except asyncio.TimeoutError:
+            # e.g. no pool connection within DB_POOL_ACQUIRE_TIMEOUT
+            if job["attempts"] < JOB_MAX_ATTEMPTS:
+                await self._retry_later(job, "Timed out", JOB_RETRY_DELAY)
+                return
+            result, status, error = None, "failed", "Timed out"
+        except Exception as e:
+            logger.error(f"Translation job {job['id']} failed: {e}")
+            result, status, error = None, "failed", str(e)
+        finally:
+            heartbeat.cancel()
+
+        async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+            await conn.execute(
+                """
+                UPDATE translation_jobs
+                SET status = $2, result = $3, error = $4, finished_at = CURRENT_TIMESTAMP
+                WHERE id = $1
+                """,
+                job["id"], status, result, error
+            )
+
+    async def _retry_later(self, job: Dict, error: str, delay: float):
+        logger.info(f"Translation job {job['id']} failed transiently ({error}); retrying in {delay:.0f}s")
+        async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+            await retry_job_later(conn, job["id"], error, delay)
+
+# Global instance
+worker_pool = TranslationWorkerPool()
+
+async def main():
+    """Run a standalone worker process: python -m backend.jobs"""
+    logging.basicConfig(level=logging.INFO)
+    await create_pool()
+    pool = TranslationWorkerPool(workers=max(TRANSLATION_WORKERS, 1))
+    try:
+        await ai_translator.start()
+        await pool.start()
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await ai_translator.aclose()
+        await close_pool()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# Hashing cost and executor size (override via environment). Each +1 on
+# BCRYPT_ROUNDS doubles the CPU per hash; see backend/benchmarks/bench_password_hashing.py.
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS, deprecated="auto")
+
+# bcrypt releases the GIL, so a thread pool sized to the cores runs hashes in
+# parallel while the event loop keeps serving other requests
+_executor: Optional[ThreadPoolExecutor] = None
+
+_LEGACY_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+_dummy_hash: Optional[str] = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Created on first use, and again after shutdown() if the app is restarted in-process"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _executor
+
+def _verify_dummy(password: str) -> bool:
+    """Spend one verification when the user does not exist, so unknown emails cost the same"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = pwd_context.hash("translearn-dummy-password")
+    return pwd_context.verify(password, _dummy_hash)
+
+def _verify_sync(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    if _LEGACY_SHA256.fullmatch(hashed):
+        # Unsalted SHA-256 from before the move to bcrypt: upgrade on success
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        if hmac.compare_digest(legacy, hashed):
+            return True, pwd_context.hash(password)
+        return False, None
+    return pwd_context.verify_and_update(password, hashed)
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), pwd_context.hash, password)
+
+async def verify_password(password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password off the event loop.
+
+    Returns (valid, new_hash). new_hash is set when the stored hash is a legacy
+    SHA-256 digest or uses a different bcrypt cost, and should be saved.
+    """
+    loop = asyncio.get_running_loop()
+    if hashed is None:
+        await loop.run_in_executor(_get_executor(), _verify_dummy, password)
+        return False, None
+    return await loop.run_in_executor(_get_executor(), _verify_sync, password, hashed)
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
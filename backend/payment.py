@@ -1,12 +1,29 @@
-import requests
+import asyncio
+import httpx
 import os
+import random
 import uuid
 from typing import Dict, Optional, List
 import logging
 from datetime import datetime, timedelta
 
+from .cache import Cache
+
 logger = logging.getLogger(__name__)
 
+# Provider HTTP client tuning (override via environment)
+PAYMENT_TIMEOUT = float(os.getenv('PAYMENT_TIMEOUT', '30'))
+PAYMENT_MAX_CONNECTIONS = int(os.getenv('PAYMENT_MAX_CONNECTIONS', '20'))
+PAYMENT_MAX_CONCURRENCY = int(os.getenv('PAYMENT_MAX_CONCURRENCY', '10'))
+PAYMENT_MAX_RETRIES = int(os.getenv('PAYMENT_MAX_RETRIES', '3'))
+PAYMENT_RETRY_BACKOFF = float(os.getenv('PAYMENT_RETRY_BACKOFF', '0.5'))
+# Successful verifications are final, so repeated checks (redirect + webhook) reuse them
+PAYMENT_VERIFY_CACHE_TTL = float(os.getenv('PAYMENT_VERIFY_CACHE_TTL', '3600'))
+
+# Errors raised before the request reached the provider; safe to retry for any method
+_RETRYABLE_BEFORE_SEND = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_RETRYABLE_STATUS = {429, 502, 503, 504}
+
 class SubscriptionPlan:
     def __init__(self, name: str, price: float, upload_limit: int, features: List[str]):
         self.name = name
@@ -18,6 +35,9 @@ class PaymentProcessor:
     def __init__(self, provider: str = "flutterwave"):
         self.provider = provider
         self.config = self._load_config()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._concurrency: Optional[asyncio.Semaphore] = None
+        self.verification_cache = Cache(f"payments:{provider}", ttl=PAYMENT_VERIFY_CACHE_TTL)
         
         # Define subscription plans
         self.subscription_plans = {
@@ -41,6 +61,52 @@ class PaymentProcessor:
             }
         }.get(self.provider, {})
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Keep-alive client for this provider, created lazily inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.config['base_url'],
+                timeout=httpx.Timeout(PAYMENT_TIMEOUT),
+                limits=httpx.Limits(max_connections=PAYMENT_MAX_CONNECTIONS,
+                                    max_keepalive_connections=PAYMENT_MAX_CONNECTIONS),
+                headers={'Authorization': f'Bearer {self.config["secret_key"]}'}
+            )
+            self._concurrency = asyncio.Semaphore(PAYMENT_MAX_CONCURRENCY)
+        return self._client
+    
+    async def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> httpx.Response:
+        """
+        Send a request to the provider with bounded concurrency and retries.
+        
+        Connection failures are retried for every method. Read timeouts and
+        429/5xx responses are only retried for GET, since a POST may already
+        have been processed by the provider.
+        """
+        client = self._get_client()
+        idempotent = method == 'GET'
+        attempt = 0
+        while True:
+            try:
+                async with self._concurrency:
+                    response = await client.request(method, path, json=payload)
+                if not (idempotent and response.status_code in _RETRYABLE_STATUS) or attempt >= PAYMENT_MAX_RETRIES:
+                    return response
+                logger.warning(f"{self.provider} {method} {path} returned {response.status_code}, retrying")
+            except httpx.TransportError as e:
+                retryable = isinstance(e, _RETRYABLE_BEFORE_SEND) or idempotent
+                if not retryable or attempt >= PAYMENT_MAX_RETRIES:
+                    raise
+                logger.warning(f"{self.provider} {method} {path} failed ({e!r}), retrying")
+            attempt += 1
+            # Exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, PAYMENT_RETRY_BACKOFF * 2 ** attempt))
+    
+    async def aclose(self):
+        """Close the provider HTTP client (called from the app lifespan)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     def get_subscription_plans(self) -> Dict:
         """Get available subscription plans"""
         return {name: {
@@ -88,9 +154,6 @@ class PaymentProcessor:
     
     async def _initiate_flutterwave(self, amount: float, email: str, phone: Optional[str], 
                                   currency: str, metadata: Optional[Dict]) -> Dict:
-        url = f"{self.config['base_url']}/payments"
-        headers = {'Authorization': f'Bearer {self.config["secret_key"]}', 'Content-Type': 'application/json'}
-        
         tx_ref = f"translearn_{uuid.uuid4().hex[:10]}"
         payload = {
             'tx_ref': tx_ref,
@@ -103,7 +166,7 @@ class PaymentProcessor:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = await self._request('POST', '/payments', payload)
             data = response.json()
             return {
                 'payment_url': data['data']['link'],
@@ -118,9 +181,6 @@ class PaymentProcessor:
     
     async def _initiate_paystack(self, amount: float, email: str, phone: Optional[str],
                                currency: str, metadata: Optional[Dict]) -> Dict:
-        url = f"{self.config['base_url']}/transaction/initialize"
-        headers = {'Authorization': f'Bearer {self.config["secret_key"]}', 'Content-Type': 'application/json'}
-        
         payload = {
             'email': email,
             'amount': int(amount * 100),
@@ -131,7 +191,7 @@ class PaymentProcessor:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = await self._request('POST', '/transaction/initialize', payload)
             data = response.json()
             return {
                 'payment_url': data['data']['authorization_url'],
@@ -145,7 +205,14 @@ class PaymentProcessor:
             raise
     
     async def verify_payment(self, transaction_id: str) -> Dict:
-        """Verify payment status"""
+        """Verify payment status; successful results are cached and concurrent checks coalesced"""
+        return await self.verification_cache.get_or_set(
+            transaction_id,
+            lambda: self._verify_uncached(transaction_id),
+            cache_if=lambda result: result.get('status') == 'success'
+        )
+    
+    async def _verify_uncached(self, transaction_id: str) -> Dict:
         if self.provider == "flutterwave":
             return await self._verify_flutterwave(transaction_id)
         elif self.provider == "paystack":
@@ -155,11 +222,8 @@ class PaymentProcessor:
             return {'status': 'success', 'amount': 100.0, 'currency': 'KES'}
     
     async def _verify_flutterwave(self, transaction_id: str) -> Dict:
-        url = f"{self.config['base_url']}/transactions/{transaction_id}/verify"
-        headers = {'Authorization': f'Bearer {self.config["secret_key"]}'}
-        
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = await self._request('GET', f'/transactions/{transaction_id}/verify')
             data = response.json()
             
             if data['status'] == 'success':
@@ -178,11 +242,8 @@ class PaymentProcessor:
             return {'status': 'error', 'message': str(e)}
     
     async def _verify_paystack(self, transaction_id: str) -> Dict:
-        url = f"{self.config['base_url']}/transaction/verify/{transaction_id}"
-        headers = {'Authorization': f'Bearer {self.config["secret_key"]}'}
-        
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = await self._request('GET', f'/transaction/verify/{transaction_id}')
             data = response.json()
             
             if data['status']:
@@ -0,0 +1,149 @@
+import time
+from itertools import combinations
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+# ----------------------------
+# Registry
+# ----------------------------
+# Hot queries are declared once by name and always run with the same SQL
+# text, so asyncpg's per-connection statement cache (statement_cache_size)
+# prepares each one once per connection and reuses the plan afterwards.
+# PreparedStatement objects are never held here: asyncpg invalidates them
+# when the connection is released back to the pool.
+QUERIES: Dict[str, str] = {}
+_stats: Dict[str, Dict[str, float]] = {}
+
+def register(name: str, sql: str) -> str:
+    if QUERIES.get(name, sql) != sql:
+        raise ValueError(f"Query {name!r} is already registered with different SQL")
+    QUERIES[name] = sql
+    _stats.setdefault(name, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+    return name
+
+async def _run(conn: asyncpg.Connection, name: str, method: str, *args):
+    stats = _stats[name]
+    start = time.perf_counter()
+    try:
+        return await getattr(conn, method)(QUERIES[name], *args)
+    except Exception:
+        stats["errors"] += 1
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed
+        stats["max_ms"] = max(stats["max_ms"], elapsed)
+
+async def fetch(conn: asyncpg.Connection, name: str, *args) -> List[asyncpg.Record]:
+    return await _run(conn, name, "fetch", *args)
+
+async def fetchrow(conn: asyncpg.Connection, name: str, *args) -> Optional[asyncpg.Record]:
+    return await _run(conn, name, "fetchrow", *args)
+
+async def fetchval(conn: asyncpg.Connection, name: str, *args) -> Any:
+    return await _run(conn, name, "fetchval", *args)
+
+def stats() -> Dict[str, Dict]:
+    """Per-query execution counts and latency"""
+    return {
+        name: {**s, "avg_ms": round(s["total_ms"] / s["calls"], 3) if s["calls"] else 0.0,
+               "total_ms": round(s["total_ms"], 3), "max_ms": round(s["max_ms"], 3)}
+        for name, s in _stats.items()
+    }
+
+# ----------------------------
+# Users
+# ----------------------------
+USER_BY_EMAIL = register("user_by_email", "SELECT * FROM users WHERE email = $1")
+
+PROFILE_BY_ID = register("profile_by_id", """
+    SELECT id, email, full_name, role, phone, country, language, balance, subscription_plan
+    FROM users WHERE id = $1
+""")
+
+TOKEN_VERSION_BY_ID = register("token_version_by_id", "SELECT token_version FROM users WHERE id = $1")
+
+BUMP_TOKEN_VERSION = register("bump_token_version", """
+    UPDATE users SET token_version = token_version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1
+    RETURNING token_version
+""")
+
+REGISTER_USER = register("register_user", """
+    INSERT INTO users (email, full_name, password_hash, role, phone, country, language)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    RETURNING id
+""")
+
+UPDATE_PASSWORD_HASH = register("update_password_hash", """
+    UPDATE users SET password_hash = $2, updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1
+    RETURNING id
+""")
+
+# ----------------------------
+# Resources
+# ----------------------------
+# Counts the upload against this month's quota ($11 = the plan's limit) and
+# inserts the resource in one statement; returns no row when the quota is used up
+CREATE_RESOURCE = register("create_resource", """
+    WITH quota AS (
+        INSERT INTO user_upload_counts (user_id, month_year, upload_count, upload_limit)
+        VALUES ($1, TO_CHAR(CURRENT_DATE, 'YYYY-MM'), 1, $11)
+        ON CONFLICT (user_id, month_year) DO UPDATE
+        SET upload_count = user_upload_counts.upload_count + 1,
+            upload_limit = EXCLUDED.upload_limit,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE user_upload_counts.upload_count < EXCLUDED.upload_limit
+        RETURNING user_id
+    )
+    INSERT INTO resources (teacher_id, title, description, subject, grade_level, language,
+                           file_url, file_type, price, tags)
+    SELECT user_id, $2, $3, $4, $5, $6, $7, $8, $9, $10 FROM quota
+    RETURNING *
+""")
+
+# Equality filters accepted by list_resources, in the order they appear in SQL
+LISTING_FILTERS = ["teacher_id", "subject", "grade_level", "language"]
+
+def build_listing_query(columns: List[str], filters: Dict[str, Any], after: Optional[tuple],
+                        limit: int) -> tuple:
+    """
+    SQL and parameters for one page of active resources, newest first.
+
+    Only filters with a value are applied. The WHERE/ORDER BY shape matches
+    the partial indexes on resources (see database/schema.sql).
+    """
+    conditions = ["is_active = TRUE"]
+    params = []
+    for column in LISTING_FILTERS:
+        if filters.get(column):
+            params.append(filters[column])
+            conditions.append(f"{column} = ${len(params)}")
+    if after:
+        params.extend(after)
+        conditions.append(f"(created_at, id) < (${len(params) - 1}, ${len(params)})")
+    params.append(limit)
+
+    query = f"""
+        SELECT {", ".join(columns)} FROM resources
+        WHERE {" AND ".join(conditions)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ${len(params)}
+    """
+    return query, params
+
+def listing_query_name(filters: Dict[str, Any], after: Optional[tuple]) -> str:
+    active = [column for column in LISTING_FILTERS if filters.get(column)]
+    return f"list_resources[{','.join(active)}{'+cursor' if after else ''}]"
+
+def register_listing_queries(columns: List[str]):
+    """Register every filter/cursor variant of the listing query for the default projection"""
+    for size in range(len(LISTING_FILTERS) + 1):
+        for combo in combinations(LISTING_FILTERS, size):
+            filters = {column: True for column in combo}
+            for after in (None, (None, None)):
+                query, _ = build_listing_query(columns, filters, after, 0)
+                register(listing_query_name(filters, after), query)
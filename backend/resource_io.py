@@ -0,0 +1,257 @@
+import csv
+import io
+import json
+import os
+import logging
+import math
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Type
+
+import asyncpg
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from .serialization import json_default
+
+logger = logging.getLogger(__name__)
+
+# Bulk import settings (override via environment)
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '5000'))
+BULK_MAX_REPORTED_ERRORS = int(os.getenv('BULK_MAX_REPORTED_ERRORS', '1000'))
+
+# VARCHAR sizes in resources; checked up front so one long value cannot abort the COPY
+COLUMN_LIMITS = {"title": 255, "subject": 100, "grade_level": 50, "language": 50,
+                 "file_url": 500, "file_type": 50}
+# Likewise for the INTEGER teacher_id and DECIMAL(10,2) price
+MAX_INT4 = 2 ** 31 - 1
+MAX_PRICE = 10 ** 8
+
+IMPORT_COLUMNS = ["row_number", "teacher_id", "title", "description", "subject", "grade_level",
+                  "language", "file_url", "file_type", "price", "tags"]
+
+def detect_format(upload: UploadFile, requested: Optional[str]) -> str:
+    fmt = (requested or "").lower()
+    if not fmt:
+        name = (upload.filename or "").lower()
+        content_type = (upload.content_type or "").lower()
+        if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+            fmt = "ndjson"
+        elif name.endswith(".csv") or "csv" in content_type:
+            fmt = "csv"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file, or pass format=csv|ndjson")
+    return fmt
+
+def _raw_rows(stream, fmt: str) -> Iterator[tuple]:
+    """Yield (row_number, dict) from the upload without reading it all into memory"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, {key: (value if value != "" else None) for key, value in row.items() if key}
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = e
+            yield row_number, row
+
+def _validate_batch(rows: Iterator[tuple], row_model: Type[BaseModel], default_teacher_id: int,
+                    allow_teacher_id: bool, size: int) -> tuple:
+    """Validate up to size rows; returns (records for COPY, errors, exhausted)"""
+    records, errors = [], []
+    for row_number, row in rows:
+        try:
+            if isinstance(row, Exception):
+                raise ValueError(f"Invalid JSON: {row}")
+            if not isinstance(row, dict):
+                raise ValueError("Each row must be an object")
+            teacher_id = default_teacher_id
+            if allow_teacher_id and row.get("teacher_id") is not None:
+                teacher_id = int(row["teacher_id"])
+                if not 1 <= teacher_id <= MAX_INT4:
+                    raise ValueError("teacher_id: out of range")
+            if isinstance(row.get("tags"), str):
+                row["tags"] = json.loads(row["tags"])
+            item = row_model(**{k: v for k, v in row.items() if k != "teacher_id"})
+            for column, limit in COLUMN_LIMITS.items():
+                value = getattr(item, column)
+                if value is not None and len(value) > limit:
+                    raise ValueError(f"{column}: longer than {limit} characters")
+            if not math.isfinite(item.price) or abs(round(item.price, 2)) >= MAX_PRICE:
+                raise ValueError("price: out of range")
+            records.append((
+                row_number, teacher_id, item.title, item.description, item.subject, item.grade_level,
+                item.language, item.file_url, item.file_type, item.price,
+                json.dumps(item.tags) if item.tags is not None else None
+            ))
+        except ValidationError as e:
+            errors.append({"row": row_number, "errors": [
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ]})
+        except (ValueError, TypeError) as e:
+            errors.append({"row": row_number, "errors": [str(e)]})
+        if len(records) + len(errors) >= size:
+            return records, errors, False
+    return records, errors, True
+
+async def import_resources(conn: asyncpg.Connection, upload: UploadFile, fmt: str,
+                           row_model: Type[BaseModel], teacher_id: int, is_admin: bool,
+                           upload_limit: Optional[int]) -> Dict:
+    """
+    Stream rows from a CSV/NDJSON upload into resources.
+
+    Rows are validated in batches and COPYed into a temporary staging table,
+    then merged into resources with one INSERT ... SELECT. Invalid rows are
+    reported by row number and skipped. When upload_limit is set, the whole
+    import is counted against this month's quota and rejected if it would
+    exceed it.
+    """
+    rows = _raw_rows(upload.file, fmt)
+    errors: List[Dict] = []
+    failed = 0
+    staged = 0
+
+    async with conn.transaction():
+        await conn.execute("""
+            CREATE TEMP TABLE resource_import (
+                row_number INTEGER,
+                teacher_id INTEGER,
+                title VARCHAR(255),
+                description TEXT,
+                subject VARCHAR(100),
+                grade_level VARCHAR(50),
+                language VARCHAR(50),
+                file_url VARCHAR(500),
+                file_type VARCHAR(50),
+                price DECIMAL(10,2),
+                tags TEXT
+            ) ON COMMIT DROP
+        """)
+
+        exhausted = False
+        while not exhausted:
+            # Parsing and validation are CPU work on a spooled file; keep them off the loop
+            records, batch_errors, exhausted = await run_in_threadpool(
+                _validate_batch, rows, row_model, teacher_id, is_admin, BULK_BATCH_SIZE
+            )
+            failed += len(batch_errors)
+            errors.extend(batch_errors[:max(BULK_MAX_REPORTED_ERRORS - len(errors), 0)])
+            if records:
+                await conn.copy_records_to_table("resource_import", records=records, columns=IMPORT_COLUMNS)
+                staged += len(records)
+
+        if staged and is_admin:
+            # Admins may import on behalf of other teachers; drop rows naming unknown users
+            orphans = await conn.fetch("""
+                DELETE FROM resource_import i
+                WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = i.teacher_id)
+                RETURNING row_number, teacher_id
+            """)
+            for orphan in orphans:
+                if len(errors) < BULK_MAX_REPORTED_ERRORS:
+                    errors.append({"row": orphan["row_number"], "errors": [f"teacher_id: unknown user {orphan['teacher_id']}"]})
+            failed += len(orphans)
+            staged -= len(orphans)
+
+        if staged and upload_limit is not None:
+            if staged > upload_limit:
+                raise HTTPException(status_code=403, detail=f"Import of {staged} resources exceeds your upload limit of {upload_limit}")
+            allowed = await conn.fetchval(
+                """
+                INSERT INTO user_upload_counts (user_id, month_year, upload_count, upload_limit)
+                VALUES ($1, TO_CHAR(CURRENT_DATE, 'YYYY-MM'), $2, $3)
+                ON CONFLICT (user_id, month_year) DO UPDATE
+                SET upload_count = user_upload_counts.upload_count + EXCLUDED.upload_count,
+                    upload_limit = EXCLUDED.upload_limit,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE user_upload_counts.upload_count + EXCLUDED.upload_count <= EXCLUDED.upload_limit
+                RETURNING upload_count
+                """,
+                teacher_id, staged, upload_limit
+            )
+            if allowed is None:
+                raise HTTPException(status_code=403, detail=f"Import of {staged} resources exceeds your remaining uploads this month")
+
+        result = await conn.execute("""
+            INSERT INTO resources (teacher_id, title, description, subject, grade_level, language,
+                                   file_url, file_type, price, tags)
+            SELECT teacher_id, title, description, subject, grade_level, language,
+                   file_url, file_type, price, tags::jsonb
+            FROM resource_import
+            ORDER BY row_number
+        """)
+
+    return {
+        "imported": int(result.split()[-1]),
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
+
+# ----------------------------
+# Export
+# ----------------------------
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', '1000'))
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    # One JSON object per chunk mapping each column to its list of values
+    "columnar": "application/x-ndjson",
+}
+
+def _encode_chunk(rows: List[asyncpg.Record], columns: List[str], fmt: str) -> str:
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for row in rows:
+            writer.writerow([
+                json.dumps(value) if isinstance(value, (dict, list)) else
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row.values()
+            ])
+        return out.getvalue()
+    if fmt == "columnar":
+        return json.dumps({"rows": len(rows), "columns": {
+            column: [row[i] for row in rows] for i, column in enumerate(columns)
+        }}, default=json_default) + "\n"
+    return "".join(json.dumps(dict(row), default=json_default) + "\n" for row in rows)
+
+def build_export_query(columns: List[str], filters: Dict[str, Any], include_inactive: bool) -> tuple:
+    conditions = [] if include_inactive else ["is_active = TRUE"]
+    params = []
+    for column, value in filters.items():
+        if value:
+            params.append(value)
+            conditions.append(f"{column} = ${len(params)}")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {', '.join(columns)} FROM resources {where} ORDER BY id", params
+
+async def export_resources(pool: asyncpg.Pool, columns: List[str], filters: Dict[str, Any],
+                           fmt: str, include_inactive: bool = False,
+                           acquire_timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Stream resources as CSV, NDJSON or columnar JSON chunks.
+
+    Rows come from a server-side cursor EXPORT_CHUNK_ROWS at a time, so memory
+    stays flat however large the table is. The export runs in one read-only
+    repeatable-read transaction and sees a consistent snapshot.
+    """
+    query, params = build_export_query(columns, filters, include_inactive)
+    if fmt == "csv":
+        out = io.StringIO()
+        csv.writer(out).writerow(columns)
+        yield out.getvalue()
+
+    async with pool.acquire(timeout=acquire_timeout) as conn:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            cursor = await conn.cursor(query, *params)
+            while True:
+                rows = await cursor.fetch(EXPORT_CHUNK_ROWS)
+                if not rows:
+                    break
+                yield _encode_chunk(rows, columns, fmt)
@@ -0,0 +1,115 @@
+"""
+EXPLAIN-based regression check for the resource listing indexes.
+
+Runs the list_resources query for every combination of filters (with and
+without a cursor) and fails unless the plan reads resources through one of
+the indexes expected for that combination (see expected_indexes).
+The check seeds resources with SEED_ROWS rows spread over teachers,
+subjects, grades and languages, with each sampled filter value on about 1%
+of them, and ANALYZEs it, so the planner costs indexes by real selectivity
+rather than breaking ties on an empty table.
+Sequential and bitmap scans are disabled so a missing or unusable index
+shows up as the wrong index name. Everything runs in a transaction that is
+rolled back.
+
+Usage (from the repository root, against a database with schema.sql applied):
+    python -m database.explain_check
+"""
+import asyncio
+import itertools
+import sys
+from datetime import datetime
+
+from backend.database import create_pool, close_pool, get_pool
+from backend.main import DEFAULT_RESOURCE_FIELDS
+from backend.queries import LISTING_FILTERS, build_listing_query
+
+SAMPLE_VALUES = {"subject": "math", "grade_level": "form 1", "language": "english"}
+
+SEED_ROWS = 50000
+SEED_TEACHERS = 200
+SEED_SQL = f"""
+WITH teachers AS (
+    INSERT INTO users (email, full_name, password_hash, role)
+    SELECT 'explain-check-' || n || '@example.invalid', 'Explain check', '-', 'teacher'
+    FROM generate_series(1, {SEED_TEACHERS}) n
+    RETURNING id
+), numbered AS (
+    SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM teachers
+)
+INSERT INTO resources (teacher_id, title, subject, grade_level, language, is_active, created_at)
+SELECT t.id, 'Resource ' || i,
+       CASE WHEN i % 100 = 0 THEN 'math' ELSE 'subject ' || i % 20 END,
+       CASE WHEN i % 100 = 0 THEN 'form 1' ELSE 'grade ' || i % 10 END,
+       CASE WHEN i % 100 = 0 THEN 'english' ELSE 'language ' || i % 5 END,
+       i % 50 <> 0,
+       now() - i * interval '1 minute'
+FROM generate_series(1, {SEED_ROWS}) i
+JOIN numbered t ON t.n = i % {SEED_TEACHERS}
+RETURNING teacher_id
+"""
+
+# Listing indexes from schema.sql and the filter columns each one leads with
+LISTING_INDEXES = {
+    "idx_resources_active_created": (),
+    "idx_resources_active_subject": ("subject",),
+    "idx_resources_active_subject_grade": ("subject", "grade_level"),
+    "idx_resources_active_grade": ("grade_level",),
+    "idx_resources_active_language": ("language",),
+    "idx_resources_teacher": ("teacher_id",),
+}
+
+def scan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from scan_nodes(child)
+
+def expected_indexes(combo: tuple) -> set:
+    """
+    Listing indexes the planner should pick for a filter combination: each
+    index is matched on the leading columns that are filtered on, and any
+    whose match is a strict subset of another index's match is dropped.
+    """
+    matched = {name: set(itertools.takewhile(lambda column: column in combo, columns))
+               for name, columns in LISTING_INDEXES.items()}
+    usable = {name: prefix for name, prefix in matched.items()
+              if prefix or not LISTING_INDEXES[name]}
+    return {name for name, prefix in usable.items()
+            if not any(prefix < other for other in usable.values())}
+
+async def main() -> int:
+    await create_pool()
+    failures = 0
+    try:
+        async with get_pool().acquire() as conn:
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                teacher_id = await conn.fetchval(SEED_SQL)
+                await conn.execute("ANALYZE resources")
+                await conn.execute("SET LOCAL enable_seqscan = off")
+                await conn.execute("SET LOCAL enable_bitmapscan = off")
+                samples = {**SAMPLE_VALUES, "teacher_id": teacher_id}
+                for size in range(len(LISTING_FILTERS) + 1):
+                    for combo in itertools.combinations(LISTING_FILTERS, size):
+                        for after in (None, (datetime(2030, 1, 1), 1)):
+                            filters = {name: samples[name] for name in combo}
+                            query, params = build_listing_query(DEFAULT_RESOURCE_FIELDS, filters, after, 21)
+                            plan = (await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *params))[0]["Plan"]
+                            used = {node["Index Name"] for node in scan_nodes(plan) if "Index Name" in node}
+                            expected = expected_indexes(combo)
+                            label = f"filters={list(combo) or '-'} cursor={'yes' if after else 'no'}"
+                            if len(used) != 1 or not used <= expected:
+                                failures += 1
+                                print(f"FAIL {label}: used {sorted(used) or 'no index'}, expected one of {sorted(expected)}")
+                            else:
+                                print(f"ok   {label}: {used.pop()}")
+            finally:
+                # Discard the seeded rows and their statistics
+                await transaction.rollback()
+    finally:
+        await close_pool()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
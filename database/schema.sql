@@ -13,10 +13,29 @@ CREATE TABLE users (
     balance DECIMAL(10,2) DEFAULT 0.00,
     subscription_plan VARCHAR(20) DEFAULT 'free',
     subscription_expires_at TIMESTAMP,
+    token_version INTEGER DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Maps a resource language to the text search configuration used to stem it
+CREATE OR REPLACE FUNCTION resource_search_config(lang TEXT)
+RETURNS regconfig AS $$
+    SELECT CASE lower(coalesce(lang, ''))
+        WHEN 'english' THEN 'english'
+        WHEN 'en' THEN 'english'
+        WHEN 'french' THEN 'french'
+        WHEN 'fr' THEN 'french'
+        WHEN 'spanish' THEN 'spanish'
+        WHEN 'es' THEN 'spanish'
+        WHEN 'portuguese' THEN 'portuguese'
+        WHEN 'pt' THEN 'portuguese'
+        WHEN 'german' THEN 'german'
+        WHEN 'de' THEN 'german'
+        ELSE 'simple'  -- Swahili, Arabic, Chinese, ... have no stemmer
+    END::regconfig
+$$ LANGUAGE sql IMMUTABLE;
+
 CREATE TABLE resources (
     id SERIAL PRIMARY KEY,
     teacher_id INTEGER REFERENCES users(id),
@@ -31,7 +50,12 @@ CREATE TABLE resources (
     tags JSONB,
     download_count INTEGER DEFAULT 0,
     is_active BOOLEAN DEFAULT TRUE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector(resource_search_config(language), coalesce(title, '')), 'A') ||
+        setweight(to_tsvector(resource_search_config(language), coalesce(description, '')), 'B') ||
+        setweight(jsonb_to_tsvector(resource_search_config(language), coalesce(tags, '{}'), '["string"]'), 'C')
+    ) STORED
 );
 
 CREATE TABLE ratings (
@@ -67,8 +91,62 @@ CREATE TABLE translations (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Monthly upload counts, checked against the plan's limit when resources are created
+CREATE TABLE user_upload_counts (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id),
+    month_year VARCHAR(7) NOT NULL, -- Format: YYYY-MM
+    upload_count INTEGER DEFAULT 0,
+    upload_limit INTEGER DEFAULT 3,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, month_year)
+);
+
+-- Translation cache keyed by model and SHA-256 of the source text
+CREATE TABLE translation_cache (
+    model_key VARCHAR(20) NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    translated_text TEXT NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_key, content_hash)
+);
+
+-- Background translation jobs, claimed by workers with FOR UPDATE SKIP LOCKED
+CREATE TABLE translation_jobs (
+    id SERIAL PRIMARY KEY,
+    resource_id INTEGER REFERENCES resources(id),
+    requested_by INTEGER REFERENCES users(id),
+    source_language VARCHAR(10) NOT NULL,
+    target_language VARCHAR(10) NOT NULL,
+    status VARCHAR(20) DEFAULT 'queued',
+    attempts INTEGER DEFAULT 0,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    not_before TIMESTAMP
+);
+
 -- Indexes
 CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_resources_subject ON resources(subject);
-CREATE INDEX idx_resources_language ON resources(language);
-CREATE INDEX idx_payments_transaction ON payments(transaction_id);
\ No newline at end of file
+
+-- Listing indexes: partial on active rows, ending in the (created_at, id) sort key
+-- so filtered pages are read in order and stop after LIMIT rows
+CREATE INDEX idx_resources_active_created ON resources(created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX idx_resources_active_subject ON resources(subject, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX idx_resources_active_subject_grade ON resources(subject, grade_level, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX idx_resources_active_grade ON resources(grade_level, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX idx_resources_active_language ON resources(language, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX idx_resources_teacher ON resources(teacher_id, created_at DESC, id DESC);
+CREATE INDEX idx_resources_search ON resources USING GIN (search_vector) WHERE is_active = TRUE;
+
+CREATE INDEX idx_payments_transaction ON payments(transaction_id);
+CREATE INDEX idx_user_upload_counts_user ON user_upload_counts(user_id);
+CREATE INDEX idx_translation_cache_last_used ON translation_cache(last_used_at);
+CREATE INDEX idx_translation_jobs_queued ON translation_jobs(created_at, id) WHERE status = 'queued';
+CREATE INDEX idx_translation_jobs_heartbeat ON translation_jobs(heartbeat_at) WHERE status = 'running';
@@ -5,6 +5,9 @@
 ALTER TABLE users ADD COLUMN IF NOT EXISTS subscription_plan VARCHAR(20) DEFAULT 'free';
 ALTER TABLE users ADD COLUMN IF NOT EXISTS subscription_expires_at TIMESTAMP;
 
+-- Bumped to revoke every token issued to a user
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER DEFAULT 0;
+
 -- Update existing users to have 'free' plan
 UPDATE users SET subscription_plan = 'free' WHERE subscription_plan IS NULL;
 
@@ -65,12 +68,86 @@ CREATE TABLE IF NOT EXISTS translation_logs (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Translation cache keyed by model and SHA-256 of the source text
+CREATE TABLE IF NOT EXISTS translation_cache (
+    model_key VARCHAR(20) NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    translated_text TEXT NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_key, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_translation_cache_last_used ON translation_cache(last_used_at);
+
+-- Background translation jobs, claimed by workers with FOR UPDATE SKIP LOCKED
+CREATE TABLE IF NOT EXISTS translation_jobs (
+    id SERIAL PRIMARY KEY,
+    resource_id INTEGER REFERENCES resources(id),
+    requested_by INTEGER REFERENCES users(id),
+    source_language VARCHAR(10) NOT NULL,
+    target_language VARCHAR(10) NOT NULL,
+    status VARCHAR(20) DEFAULT 'queued',
+    attempts INTEGER DEFAULT 0,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    not_before TIMESTAMP
+);
+ALTER TABLE translation_jobs ADD COLUMN IF NOT EXISTS not_before TIMESTAMP;
+ALTER TABLE translation_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP;
+UPDATE translation_jobs SET heartbeat_at = started_at WHERE status = 'running' AND heartbeat_at IS NULL;
+
+-- Maps a resource language to the text search configuration used to stem it
+CREATE OR REPLACE FUNCTION resource_search_config(lang TEXT)
+RETURNS regconfig AS $$
+    SELECT CASE lower(coalesce(lang, ''))
+        WHEN 'english' THEN 'english'
+        WHEN 'en' THEN 'english'
+        WHEN 'french' THEN 'french'
+        WHEN 'fr' THEN 'french'
+        WHEN 'spanish' THEN 'spanish'
+        WHEN 'es' THEN 'spanish'
+        WHEN 'portuguese' THEN 'portuguese'
+        WHEN 'pt' THEN 'portuguese'
+        WHEN 'german' THEN 'german'
+        WHEN 'de' THEN 'german'
+        ELSE 'simple'  -- Swahili, Arabic, Chinese, ... have no stemmer
+    END::regconfig
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Full-text search vector over title, description and tags
+ALTER TABLE resources ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector(resource_search_config(language), coalesce(title, '')), 'A') ||
+    setweight(to_tsvector(resource_search_config(language), coalesce(description, '')), 'B') ||
+    setweight(jsonb_to_tsvector(resource_search_config(language), coalesce(tags, '{}'), '["string"]'), 'C')
+) STORED;
+
 -- Add indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_subscription ON users(subscription_plan);
 CREATE INDEX IF NOT EXISTS idx_subscription_plans_user ON subscription_plans(user_id);
 CREATE INDEX IF NOT EXISTS idx_payment_transactions_user ON payment_transactions(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_upload_counts_user ON user_upload_counts(user_id);
 CREATE INDEX IF NOT EXISTS idx_translation_logs_user ON translation_logs(user_id);
+-- Listing indexes: partial on active rows, ending in the (created_at, id) sort key
+-- so filtered pages are read in order and stop after LIMIT rows
+CREATE INDEX IF NOT EXISTS idx_resources_active_created ON resources(created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_resources_active_subject ON resources(subject, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_resources_active_subject_grade ON resources(subject, grade_level, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_resources_active_grade ON resources(grade_level, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_resources_active_language ON resources(language, created_at DESC, id DESC) WHERE is_active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_resources_teacher ON resources(teacher_id, created_at DESC, id DESC);
+-- Superseded by the partial composite indexes above
+DROP INDEX IF EXISTS idx_resources_subject;
+DROP INDEX IF EXISTS idx_resources_language;
+CREATE INDEX IF NOT EXISTS idx_resources_search ON resources USING GIN (search_vector) WHERE is_active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_translation_jobs_queued ON translation_jobs(created_at, id) WHERE status = 'queued';
+DROP INDEX IF EXISTS idx_translation_jobs_running;
+CREATE INDEX IF NOT EXISTS idx_translation_jobs_heartbeat ON translation_jobs(heartbeat_at) WHERE status = 'running';
 
 -- Insert default subscription plan data
 INSERT INTO subscription_plans (user_id, plan_name, plan_type, amount, currency, status, expires_at)
@@ -52,9 +52,6 @@ if %errorlevel% equ 0 (
     echo 🚀 Deploying to Railway...
     echo.
     
-    REM Change to backend directory
-    cd backend
-    
     REM Deploy to Railway
     echo Running: railway up
     railway up
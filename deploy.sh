@@ -55,9 +55,6 @@ if command -v railway &> /dev/null; then
     echo "🚀 Deploying to Railway..."
     echo ""
     
-    # Change to backend directory
-    cd backend
-    
     # Deploy to Railway
     echo "Running: railway up"
     railway up
@@ -0,0 +1,106 @@
+"""
+MicroBatcher fan-out, deduplication and cancellation, with a fake engine call.
+
+    python -m unittest tests.test_batching
+"""
+import asyncio
+import unittest
+from typing import List
+
+from backend.ai_translator import AITranslator, MicroBatcher
+
+class FakeRun:
+    """Stands in for AITranslator._run_engine: upper-cases texts, optionally held on a gate"""
+
+    def __init__(self, gate: asyncio.Event = None, error: Exception = None):
+        self.gate = gate
+        self.error = error
+        self.calls: List[List[str]] = []
+        self.finished = 0
+
+    async def __call__(self, model_key: str, texts: List[str]) -> List[str]:
+        self.calls.append(list(texts))
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        self.finished += 1
+        return [text.upper() for text in texts]
+
+class MicroBatcherTest(unittest.IsolatedAsyncioTestCase):
+    def batcher(self, run: FakeRun, max_wait: float = 0.01, max_items: int = 32) -> MicroBatcher:
+        return MicroBatcher(run, AITranslator._pack, max_wait, max_items, 16384)
+
+    async def test_concurrent_calls_share_one_deduplicated_engine_call(self):
+        run = FakeRun()
+        batcher = self.batcher(run)
+        results = await asyncio.gather(
+            batcher.submit("en-sw", ["a", "b"]),
+            batcher.submit("en-sw", ["b", "c"]),
+            batcher.submit("en-sw", ["a"]),
+        )
+
+        self.assertEqual(results, [["A", "B"], ["B", "C"], ["A"]])
+        self.assertEqual(run.calls, [["a", "b", "c"]])
+        self.assertEqual(batcher.counters["timer_flushes"], 1)
+
+    async def test_models_are_batched_separately(self):
+        run = FakeRun()
+        batcher = self.batcher(run)
+        await asyncio.gather(batcher.submit("en-sw", ["a"]), batcher.submit("en-fr", ["a"]))
+        self.assertEqual(sorted(run.calls), [["a"], ["a"]])
+
+    async def test_full_batch_is_sent_without_waiting(self):
+        run = FakeRun()
+        batcher = self.batcher(run, max_wait=60, max_items=2)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.submit("en-sw", ["a"]), batcher.submit("en-sw", ["b"])), timeout=1
+        )
+        self.assertEqual(results, [["A"], ["B"]])
+        self.assertEqual(batcher.counters["full_flushes"], 1)
+
+    async def test_cancelled_caller_does_not_affect_others(self):
+        gate = asyncio.Event()
+        run = FakeRun(gate)
+        batcher = self.batcher(run)
+        leaving = asyncio.create_task(batcher.submit("en-sw", ["a"]))
+        staying = asyncio.create_task(batcher.submit("en-sw", ["a", "b"]))
+        await asyncio.sleep(0.05)  # batch flushed and waiting on the engine
+        leaving.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+
+        self.assertEqual(await staying, ["A", "B"])
+        with self.assertRaises(asyncio.CancelledError):
+            await leaving
+        self.assertEqual(run.calls, [["a", "b"]])
+        self.assertEqual(run.finished, 1)
+
+    async def test_texts_whose_callers_all_left_are_not_sent(self):
+        run = FakeRun()
+        batcher = self.batcher(run, max_wait=0.05)
+        leaving = asyncio.create_task(batcher.submit("en-sw", ["x"]))
+        staying = asyncio.create_task(batcher.submit("en-sw", ["y"]))
+        await asyncio.sleep(0)
+        leaving.cancel()
+
+        self.assertEqual(await staying, ["Y"])
+        self.assertEqual(run.calls, [["y"]])
+
+    async def test_engine_error_reaches_every_caller(self):
+        run = FakeRun(error=RuntimeError("engine down"))
+        batcher = self.batcher(run)
+        results = await asyncio.gather(
+            batcher.submit("en-sw", ["a"]), batcher.submit("en-sw", ["b"]), return_exceptions=True
+        )
+        self.assertEqual([str(r) for r in results], ["engine down", "engine down"])
+        self.assertEqual(len(run.calls), 1)
+
+    async def test_zero_wait_calls_the_engine_directly(self):
+        run = FakeRun()
+        batcher = self.batcher(run, max_wait=0)
+        await asyncio.gather(batcher.submit("en-sw", ["a"]), batcher.submit("en-sw", ["a"]))
+        self.assertEqual(run.calls, [["a"], ["a"]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Shared cache single-flight and invalidation, against the in-process backend
+and against fakeredis standing in for a Redis server.
+
+    python -m unittest tests.test_cache
+"""
+import asyncio
+import itertools
+import unittest
+
+from backend import cache
+
+try:
+    import fakeredis
+except ImportError:  # optional: the Redis cases are skipped
+    fakeredis = None
+
+_namespaces = itertools.count()
+
+class CacheCases:
+    """Cases run against each backend; subclasses provide make_backend()"""
+
+    def make_backend(self) -> cache.CacheBackend:
+        raise NotImplementedError
+
+    async def asyncSetUp(self):
+        cache._backend = self.make_backend()
+        self.cache = cache.Cache(f"test_{next(_namespaces)}", ttl=60)
+        self.loads = 0
+
+    async def asyncTearDown(self):
+        await cache.close_backend()
+
+    def loader(self, value, gate: asyncio.Event = None):
+        async def load():
+            self.loads += 1
+            if gate is not None:
+                await gate.wait()
+            return value
+        return load
+
+    async def test_concurrent_loads_are_coalesced(self):
+        gate = asyncio.Event()
+        calls = [asyncio.create_task(self.cache.get_or_set("k", self.loader("v", gate))) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        self.assertEqual(await asyncio.gather(*calls), ["v"] * 5)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.cache.counters["coalesced"], 4)
+        self.assertEqual(await self.cache.get("k"), "v")
+
+    async def test_follower_loads_itself_when_leader_is_cancelled(self):
+        gate = asyncio.Event()
+        leader = asyncio.create_task(self.cache.get_or_set("k", self.loader("v", gate)))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(self.cache.get_or_set("k", self.loader("v", gate)))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        self.assertEqual(await follower, "v")
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(self.cache._inflight, {})
+
+    async def test_load_straddling_invalidate_is_stored_under_old_version(self):
+        old_version = await self.cache._current_version()
+        gate = asyncio.Event()
+        call = asyncio.create_task(self.cache.get_or_set("k", self.loader("stale", gate)))
+        await asyncio.sleep(0.01)
+        await self.cache.invalidate()
+        gate.set()
+
+        self.assertEqual(await call, "stale")
+        self.assertEqual(await self.cache.get_many(["k"], old_version), ["stale"])
+        self.assertIsNone(await self.cache.get("k"))
+        self.assertEqual(await self.cache.get_or_set("k", self.loader("fresh")), "fresh")
+        self.assertEqual(self.loads, 2)
+
+    async def test_invalidate_drops_namespace(self):
+        await self.cache.set_many({"a": 1, "b": 2})
+        self.assertEqual(await self.cache.get_many(["a", "b"]), [1, 2])
+        await self.cache.invalidate()
+        self.assertEqual(await self.cache.get_many(["a", "b"]), [None, None])
+
+class MemoryBackendTest(CacheCases, unittest.IsolatedAsyncioTestCase):
+    def make_backend(self) -> cache.CacheBackend:
+        return cache.MemoryBackend()
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class RedisBackendTest(CacheCases, unittest.IsolatedAsyncioTestCase):
+    def make_backend(self) -> cache.CacheBackend:
+        return cache.RedisBackend(client=fakeredis.FakeAsyncRedis())
+
+    async def test_values_round_trip_as_json_with_ttl(self):
+        await self.cache.set("k", {"items": [1, "two"]}, ttl=5)
+        self.assertEqual(await self.cache.get("k"), {"items": [1, "two"]})
+        key = self.cache._key("k", await self.cache._current_version())
+        self.assertGreater(await cache.get_backend()._redis.pttl(key), 0)
+
+if __name__ == "__main__":
+    unittest.main()
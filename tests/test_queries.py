@@ -0,0 +1,41 @@
+"""
+Query registry against a real Postgres.
+
+Set TEST_DATABASE_URL to run, e.g.:
+    TEST_DATABASE_URL=postgresql://postgres@localhost/postgres python -m unittest tests.test_queries
+"""
+import os
+import unittest
+
+import asyncpg
+
+from backend import queries
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+ADD_ONE = queries.register("test_add_one", "SELECT $1::int + 1")
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class RegistryTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # One connection, so every acquire below reuses the same one
+        self.pool = await asyncpg.create_pool(TEST_DATABASE_URL, min_size=1, max_size=1)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_query_runs_again_after_connection_is_released(self):
+        before = dict(queries.stats()[ADD_ONE])
+        async with self.pool.acquire() as conn:
+            self.assertEqual(await queries.fetchval(conn, ADD_ONE, 1), 2)
+        async with self.pool.acquire() as conn:
+            self.assertEqual(await queries.fetchval(conn, ADD_ONE, 2), 3)
+            row = await queries.fetchrow(conn, ADD_ONE, 3)
+            self.assertEqual(row[0], 4)
+
+        after = queries.stats()[ADD_ONE]
+        self.assertEqual(after["calls"] - before["calls"], 3)
+        self.assertEqual(after["errors"] - before["errors"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
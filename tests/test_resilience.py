@@ -0,0 +1,192 @@
+"""
+Circuit breaker transitions and hedged engine calls, with fake engines.
+
+    python -m unittest tests.test_resilience
+"""
+import asyncio
+import unittest
+from typing import List
+from unittest import mock
+
+from fastapi import HTTPException
+
+import backend.ai_translator as translation
+from backend.ai_translator import AITranslator, CircuitBreaker, LatencyWindow, TranslationEngine
+
+MODEL_KEY = "en-sw"
+
+class FakeEngine(TranslationEngine):
+    """Answers "<name>:<text>" after delay seconds, or raises error"""
+
+    def __init__(self, name: str, delay: float = 0.0, error: Exception = None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def translate(self, model_name: str, inputs: List[str]) -> List[str]:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return [f"{self.name}:{text}" for text in inputs]
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_after=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()  # resets the run of failures
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.counters, {"opened": 1, "rejected": 1})
+        self.assertGreaterEqual(breaker.retry_after(), 59)
+
+    def test_half_open_lets_one_probe_through(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_after=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_after=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.reset_after = 60
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.counters["opened"], 2)
+
+    def test_cancelled_probe_frees_the_slot(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_after=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_cancel()
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow())
+
+class EngineCallTest(unittest.IsolatedAsyncioTestCase):
+    def translator(self, primary: FakeEngine, alternate: FakeEngine = None) -> AITranslator:
+        translator = AITranslator()
+        translator.pair_engines[MODEL_KEY] = primary
+        translator.hedge_engines = {MODEL_KEY: alternate} if alternate else {}
+        return translator
+
+    def open_breaker(self, translator: AITranslator, engine: FakeEngine, reset_after: float = 60):
+        breaker = translator._breaker(engine, MODEL_KEY)
+        breaker.reset_after = reset_after
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        return breaker
+
+    async def test_open_breaker_fails_fast_with_retry_after(self):
+        primary = FakeEngine("primary")
+        translator = self.translator(primary)
+        self.open_breaker(translator, primary)
+
+        with self.assertRaises(HTTPException) as raised:
+            await translator._run_engine(MODEL_KEY, ["a"])
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertIn("Retry-After", raised.exception.headers)
+        self.assertEqual(primary.calls, 0)
+
+    async def test_open_breaker_fails_over_to_the_hedge_engine(self):
+        primary, alternate = FakeEngine("primary"), FakeEngine("alternate")
+        translator = self.translator(primary, alternate)
+        self.open_breaker(translator, primary)
+
+        self.assertEqual(await translator._run_engine(MODEL_KEY, ["a"]), ["alternate:a"])
+        self.assertEqual(primary.calls, 0)
+        self.assertEqual(translator.hedge_stats["failovers"], 1)
+
+    async def test_server_errors_open_the_breaker_but_client_errors_do_not(self):
+        primary = FakeEngine("primary", error=HTTPException(status_code=400, detail="bad input"))
+        translator = self.translator(primary)
+        breaker = translator._breaker(primary, MODEL_KEY)
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(HTTPException):
+                await translator._run_engine(MODEL_KEY, ["a"])
+        self.assertEqual(breaker.state, "closed")
+
+        primary.error = HTTPException(status_code=500, detail="down")
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(HTTPException):
+                await translator._run_engine(MODEL_KEY, ["a"])
+        self.assertEqual(breaker.state, "open")
+
+    async def test_successful_probe_closes_the_breaker(self):
+        primary = FakeEngine("primary")
+        translator = self.translator(primary)
+        breaker = self.open_breaker(translator, primary, reset_after=0)
+
+        self.assertEqual(await translator._run_engine(MODEL_KEY, ["a"]), ["primary:a"])
+        self.assertEqual(breaker.state, "closed")
+
+@mock.patch.object(translation, "TRANSLATION_HEDGE", True)
+class HedgingTest(unittest.IsolatedAsyncioTestCase):
+    def translator(self, primary: FakeEngine, alternate: FakeEngine = None,
+                   hedge_after: float = 0.01) -> AITranslator:
+        translator = AITranslator()
+        translator.pair_engines[MODEL_KEY] = primary
+        translator.hedge_engines = {MODEL_KEY: alternate} if alternate else {}
+        window = translator.latencies[MODEL_KEY] = LatencyWindow()
+        for _ in range(translation.TRANSLATION_HEDGE_MIN_SAMPLES):
+            window.add(hedge_after)
+        return translator
+
+    async def test_fast_call_is_not_hedged(self):
+        primary, alternate = FakeEngine("primary"), FakeEngine("alternate")
+        translator = self.translator(primary, alternate, hedge_after=1)
+
+        self.assertEqual(await translator._run_engine(MODEL_KEY, ["a"]), ["primary:a"])
+        self.assertEqual((alternate.calls, translator.hedge_stats["hedged"]), (0, 0))
+
+    async def test_hedge_wins_and_slow_call_is_cancelled(self):
+        primary, alternate = FakeEngine("primary", delay=5), FakeEngine("alternate")
+        translator = self.translator(primary, alternate)
+
+        result = await asyncio.wait_for(translator._run_engine(MODEL_KEY, ["a"]), timeout=1)
+        await asyncio.sleep(0)
+        self.assertEqual(result, ["alternate:a"])
+        self.assertEqual(primary.cancelled, 1)
+        self.assertEqual(translator.hedge_stats, {"hedged": 1, "hedge_wins": 1, "failovers": 0})
+        # Losing the race is not a failure of the primary
+        self.assertEqual(translator._breaker(primary, MODEL_KEY).failures, 0)
+
+    async def test_hedge_goes_to_the_same_engine_without_an_alternate(self):
+        primary = FakeEngine("primary", delay=0.05)
+        translator = self.translator(primary)
+
+        self.assertEqual(await translator._run_engine(MODEL_KEY, ["a"]), ["primary:a"])
+        await asyncio.sleep(0)
+        self.assertEqual(primary.calls, 2)
+        self.assertEqual(primary.cancelled, 1)
+
+    async def test_failed_hedge_falls_back_to_the_original_call(self):
+        primary = FakeEngine("primary", delay=0.05)
+        alternate = FakeEngine("alternate", error=HTTPException(status_code=500, detail="down"))
+        translator = self.translator(primary, alternate)
+
+        self.assertEqual(await translator._run_engine(MODEL_KEY, ["a"]), ["primary:a"])
+        self.assertEqual(translator.hedge_stats["hedge_wins"], 0)
+
+if __name__ == "__main__":
+    unittest.main()